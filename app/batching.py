@@ -0,0 +1,102 @@
+"""
+Micro-batching for webhook text messages before they reach LangGraph
+"""
+import asyncio
+import logging
+import weakref
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# One lock per conversation, shared by every path that runs a graph turn (text
+# batches here, voice notes in speech_processor): a thread's turns never overlap
+_thread_locks = weakref.WeakValueDictionary()
+
+
+def thread_lock(thread_id: str) -> asyncio.Lock:
+    """The conversation's turn lock; callers must hold the returned reference while using it"""
+    lock = _thread_locks.get(thread_id)
+    if lock is None:
+        lock = _thread_locks[thread_id] = asyncio.Lock()
+    return lock
+
+
+class LLMBatcher:
+    """
+    Collects webhook messages for a short window and dispatches them together.
+
+    Each conversation keeps its own graph state, so a batch can't become one
+    model call; instead the batch is fanned out onto the executor at once and
+    each caller's Future resolves individually. Within the window:
+      - identical (thread_id, text) submissions still waiting in the window,
+        e.g. a Twilio retry, share one invocation; once the batch is dispatched
+        a repeat (a user answering "yes" again) is a new message and runs again;
+      - messages from the same thread run in arrival order, never concurrently
+        (with each other or with that thread's voice notes, see thread_lock).
+    """
+
+    def __init__(self, handler: Callable[[str, str], str], executor: Optional[Executor] = None,
+                 window_ms: float = 30.0, max_batch: int = 32):
+        self.handler = handler
+        self.executor = executor
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._queued: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def submit(self, text: str, thread_id: str) -> str:
+        """Queue one message and wait for its reply"""
+        key = (thread_id, text)
+        future = self._queued.get(key)
+        if future is None:
+            self._ensure_worker()
+            future = self._queued[key] = asyncio.get_running_loop().create_future()
+            self._queue.put_nowait(key)
+        else:
+            logger.info("[Batcher] Coalescing duplicate message for thread %s", thread_id)
+        # shield: one caller disconnecting must not cancel the shared result
+        return await asyncio.shield(future)
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # dispatched messages stop accepting duplicates; take their futures along
+            # group by thread, keeping arrival order inside each group
+            by_thread: Dict[str, List[Tuple[Tuple[str, str], asyncio.Future]]] = {}
+            for key in batch:
+                by_thread.setdefault(key[0], []).append((key, self._queued.pop(key)))
+            logger.debug("[Batcher] Dispatching %d messages across %d threads", len(batch), len(by_thread))
+            for thread_id, keys in by_thread.items():
+                loop.create_task(self._run_thread(thread_id, keys))
+
+    async def _run_thread(self, thread_id: str, entries: List[Tuple[Tuple[str, str], asyncio.Future]]):
+        # also serializes against this thread's earlier batches and voice notes
+        async with thread_lock(thread_id):
+            loop = asyncio.get_running_loop()
+            for key, future in entries:
+                try:
+                    reply = await loop.run_in_executor(self.executor, self.handler, key[1], thread_id)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(reply)
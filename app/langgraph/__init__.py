@@ -4,16 +4,16 @@ LangGraph package for flight search chatbot
 
 from .graph_config import (
     create_graph,
+    get_graph,
     invoke_graph,
     extract_last_ai_text,
-    get_current_thread_id,
     State
 )
 
 __all__ = [
     'create_graph',
+    'get_graph',
     'invoke_graph',
     'extract_last_ai_text',
-    'get_current_thread_id',
     'State'
 ] 
\ No newline at end of file
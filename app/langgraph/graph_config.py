@@ -4,6 +4,7 @@ LangGraph configuration and setup for the flight search chatbot
 
 import os
 import json, ast
+import functools
 from typing import Annotated
 from typing_extensions import TypedDict
 from dotenv import load_dotenv
@@ -13,18 +14,12 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import InMemorySaver
 from langchain_core.messages import ToolMessage, HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
 
+from ..services.http_client import get_http_client
 from ..tools.FlightSearchStateMachine import FlightSearchStateMachine, BulkFlightSearch
 from .memory_manager import memory_manager
 
-# Global variable to store current thread_id for tools
-_current_thread_id = "default"
-
-def get_current_thread_id():
-    """Get the current thread_id for use in tools"""
-    return _current_thread_id
-
-
 class State(TypedDict):
     """State definition for the LangGraph conversation flow"""
     messages: Annotated[list[dict], add_messages]
@@ -36,7 +31,10 @@ class BasicToolNode:
     def __init__(self, tools: list) -> None:
         self.tools_by_name = {tool.name: tool for tool in tools}
 
-    def __call__(self, inputs: dict):
+    def __call__(self, inputs: dict, config: RunnableConfig):
+        # Per-run settings come from the invoke config, never module state: several
+        # conversations run the graph concurrently on the LLM and voice pools
+        configurable = config.get("configurable", {})
         if messages := inputs.get("messages", []):
             message = messages[-1]
         else:
@@ -47,23 +45,20 @@ class BasicToolNode:
             # Pass thread_id, user_input_text, and voice mode to tools that need them
             tool_args = tool_call["args"]
             if tool_call["name"] in ["FlightSearchStateMachine", "BulkFlightSearch"]:
-                # Try to get thread_id from config first, then fallback to global variable
-                config_thread_id = inputs.get("configurable", {}).get("thread_id")
-                global _current_thread_id
-                extracted_thread_id = config_thread_id if config_thread_id else _current_thread_id
+                # The conversation's thread_id always comes from the run config
+                extracted_thread_id = configurable["thread_id"]
                 existing_thread_id = tool_args.get("thread_id", "not_set")
                 tool_args["thread_id"] = extracted_thread_id
                 print(f"[BasicToolNode] Setting thread_id for {tool_call['name']}: {extracted_thread_id} (was: {existing_thread_id})")
-                print(f"[BasicToolNode] Source: {'config' if config_thread_id else 'global'}, Config: {inputs.get('configurable', {})}")
                 
                 # Set mode of conversation based on voice detection
-                is_voice_mode = inputs.get("configurable", {}).get("is_voice_mode", False)
+                is_voice_mode = configurable.get("is_voice_mode", False)
                 if "mode_of_conversation" not in tool_args:
                     tool_args["mode_of_conversation"] = "voice" if is_voice_mode else "text"
                     print(f"[BasicToolNode] Setting mode_of_conversation: {tool_args['mode_of_conversation']}")
                 
                 # Set detected language
-                detected_language = inputs.get("configurable", {}).get("detected_language", "en")
+                detected_language = configurable.get("detected_language", "en")
                 if "detected_language" not in tool_args:
                     tool_args["detected_language"] = detected_language
                     print(f"[BasicToolNode] Setting detected_language: {detected_language}")
@@ -76,9 +71,15 @@ class BasicToolNode:
                             tool_args["user_input_text"] = user_messages[-1].content
             
             tool_result = self.tools_by_name[tool_call["name"]].invoke(tool_args)
+            # Structured results ({"text", "summary", "trip_type", "status"}) are
+            # passed as JSON so the model can read the summary fields directly
+            if isinstance(tool_result, dict):
+                content = json.dumps(tool_result, ensure_ascii=False, default=str)
+            else:
+                content = str(tool_result)
             outputs.append(
                 ToolMessage(
-                    content=str(tool_result),
+                    content=content,
                     name=tool_call["name"],
                     tool_call_id=tool_call["id"],
                 )
@@ -124,7 +125,7 @@ def create_graph():
     tools = [FlightSearchStateMachine, BulkFlightSearch]
     
     # Initialize LLM
-    llm = init_chat_model("gpt-4o-mini", model_provider="openai", temperature=0)
+    llm = init_chat_model("gpt-4o-mini", model_provider="openai", temperature=0, http_client=get_http_client())
     llm_with_tools = llm.bind_tools(tools)
     
     # Create state graph
@@ -161,15 +162,18 @@ def create_graph():
     return graph
 
 
+@functools.cache
+def get_graph():
+    """Build the graph on first use and share it (and its checkpointer) afterwards"""
+    return create_graph()
+
+
 def invoke_graph(graph, user_message: str, thread_id: str = "default", is_voice: bool = False, detected_language: str = "en"):
     """
     Convenience function to invoke the graph with a user message.
     Integrates with MemoryManager for persistent chat history.
     """
-    global _current_thread_id
-    _current_thread_id = thread_id
     print(f"[GraphConfig] Invoking graph for thread {thread_id} with message: '{user_message[:50]}...' (voice: {is_voice}, language: {detected_language})")
-    print(f"[GraphConfig] Set global thread_id to: {_current_thread_id}")
     
     # Initialize session and load context from DynamoDB
     memory_manager.on_session_start(thread_id)
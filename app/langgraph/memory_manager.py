@@ -7,6 +7,10 @@ and manages session lifecycle with idle timeouts.
 import time
 import uuid
 import json
+import queue
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import deque
 from typing import List, Dict, Any, Optional
 import boto3
 import threading
@@ -14,6 +18,7 @@ import threading
 from .memory_utils import (
     Message, Pair, ThreadState,
     CHAT_HISTORY_TABLE, AWS_REGION, SESSION_IDLE_SECONDS, CONTEXT_PAIRS, BATCH_PAIRS, MAX_RAM_PAIRS,
+    WRITE_QUEUE_MAX, WRITE_CONCURRENCY, WRITE_WAIT_SECONDS,
     get_now_iso, get_next_seq_from_dynamodb, get_next_turn_from_dynamodb,
     read_pairs_from_dynamodb, load_conversation_state_from_dynamodb
 )
@@ -31,6 +36,19 @@ class MemoryManager:
         self._global_lock = threading.Lock()
 
         self.table_name = CHAT_HISTORY_TABLE
+
+        # Flushes hand built items to a single writer thread so request handling
+        # never waits on BatchWriteItem; the bound applies backpressure under bursts.
+        # Each entry is (thread_id, items, future); None stops the writer.
+        self._write_queue: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_MAX)
+        # Latest queued write per thread, and items whose write failed (retried on
+        # that thread's next flush); both guarded by _write_lock, never a thread lock
+        self._pending_writes: Dict[str, Future] = {}
+        self._failed_items: Dict[str, List[Dict[str, Any]]] = {}
+        self._write_lock = threading.Lock()
+        self._chunk_executor = ThreadPoolExecutor(max_workers=WRITE_CONCURRENCY, thread_name_prefix="dynamodb-chunk")
+        self._writer = threading.Thread(target=self._writer_loop, name="dynamodb-writer", daemon=True)
+        self._writer.start()
         
         print(f"[MemoryManager] Initialized with table: {CHAT_HISTORY_TABLE}, region: {AWS_REGION}")
         print(f"[MemoryManager] Config - Context pairs: {CONTEXT_PAIRS}, Batch pairs: {BATCH_PAIRS}, Max RAM pairs: {MAX_RAM_PAIRS}")
@@ -41,6 +59,10 @@ class MemoryManager:
     
     def _get_thread_state(self, thread_id: str) -> ThreadState:
         """Get or create thread state"""
+        # Existing threads (the common case) skip the global lock; dict reads are atomic
+        thread_state = self.threads.get(thread_id)
+        if thread_state is not None:
+            return thread_state
         with self._global_lock:
             if thread_id not in self.threads:
                 print(f"[MemoryManager] Creating new thread state for {thread_id}")
@@ -66,7 +88,7 @@ class MemoryManager:
     def _evict_oldest_pair_to_batch(self, thread_state: ThreadState) -> None:
         """Move oldest pair from context to batch buffer"""
         if thread_state.context_pairs:
-            oldest_pair = thread_state.context_pairs.pop(0)
+            oldest_pair = thread_state.context_pairs.popleft()
             thread_state.batch_pairs.append(oldest_pair)
             print(f"[MemoryManager] Evicted oldest pair (turn {oldest_pair.turn}) to batch for thread {thread_state.thread_id}")
     
@@ -140,39 +162,46 @@ class MemoryManager:
         for i, msg in enumerate(missing):
             msg.seq = start + i
 
-    def _batch_write_pairs(self, thread_id: str, pairs: list, session_id: str) -> None:
+    def _batch_write_pairs(self, thread_id: str, pairs: list, session_id: str) -> Optional[Future]:
         if not pairs:
-            return
+            return None
 
         # ensure any missing seqs get unique values
         self._assign_seqs_for_flush(thread_id, pairs)
 
+        # Items are already in DynamoDB's wire format; attribute values common to
+        # the whole flush (or pair) are built once and shared, boto3 only reads them
+        thread_attr = {"S": thread_id}
+        session_attr = {"S": session_id}
+        user_attr = {"S": "user"}
+        assistant_attr = {"S": "assistant"}
+
         items = []
         for p in pairs:
-            turn = int(p.turn)
+            turn_attr = {"N": str(int(p.turn))}
 
             um = p.user_message
             if um:
                 items.append({
-                    "thread_id": {"S": thread_id},
+                    "thread_id": thread_attr,
                     "seq": {"N": str(int(um.seq))},
-                    "turn": {"N": str(turn)},
-                    "role": {"S": "user"},
+                    "turn": turn_attr,
+                    "role": user_attr,
                     "content": {"S": str(um.content)[:38000]},
                     "ts_iso": {"S": um.ts_iso or get_now_iso()},
-                    "session_id": {"S": session_id},
+                    "session_id": session_attr,
                 })
 
             am = p.assistant_message
             if am:
                 items.append({
-                    "thread_id": {"S": thread_id},
+                    "thread_id": thread_attr,
                     "seq": {"N": str(int(am.seq))},
-                    "turn": {"N": str(turn)},
-                    "role": {"S": "assistant"},
+                    "turn": turn_attr,
+                    "role": assistant_attr,
                     "content": {"S": str(am.content)[:38000]},
                     "ts_iso": {"S": am.ts_iso or get_now_iso()},
-                    "session_id": {"S": session_id},
+                    "session_id": session_attr,
                 })
 
         # defensive dup-key guard
@@ -183,21 +212,116 @@ class MemoryManager:
                 raise RuntimeError(f"Duplicate key in batch build: {k}")
             seen.add(k)
 
-        # chunk <= 25 and write with retry on unprocessed
-        CHUNK = 25
-        i = 0
-        while i < len(items):
-            chunk = [{"PutRequest": {"Item": it}} for it in items[i:i+CHUNK]]
-            backoff = 0.5
+        # items are built here because callers clear their pair lists right after
+        return self._enqueue_items(thread_id, items)
+
+    def _enqueue_items(self, thread_id: str, items: List[Dict[str, Any]]) -> Optional[Future]:
+        """Queue items for the writer, picking up this thread's failed items for a retry"""
+        with self._write_lock:
+            failed = self._failed_items.pop(thread_id, None)
+        if failed:
+            keys = {it["seq"]["N"] for it in items}
+            items = [it for it in failed if it["seq"]["N"] not in keys] + items
+            print(f"[MemoryManager] Retrying {len(failed)} previously failed items for thread {thread_id}")
+        if not items:
+            return None
+
+        future: Future = Future()
+        with self._write_lock:
+            self._pending_writes[thread_id] = future
+        future.add_done_callback(lambda f, thread_id=thread_id: self._forget_write(thread_id, f))
+        self._write_queue.put((thread_id, items, future))
+        return future
+
+    def _forget_write(self, thread_id: str, future: Future) -> None:
+        with self._write_lock:
+            if self._pending_writes.get(thread_id) is future:
+                del self._pending_writes[thread_id]
+
+    def _wait_for_writes(self, thread_id: str) -> None:
+        """
+        Block until this thread's queued writes are in DynamoDB, retrying failed ones first.
+        Raises if they can't be written: reading before then would load stale pairs and
+        reset next_seq, so new messages would overwrite stored ones.
+        """
+        with self._write_lock:
+            has_failed = thread_id in self._failed_items
+        if has_failed:
+            self._enqueue_items(thread_id, [])
+        with self._write_lock:
+            future = self._pending_writes.get(thread_id)
+        if future is not None:
+            print(f"[MemoryManager] Waiting for pending DynamoDB writes for thread {thread_id}")
+            future.result(timeout=WRITE_WAIT_SECONDS)
+
+    def _writer_loop(self) -> None:
+        """Drain queued flushes, combining them so one BatchWriteItem carries up to 25 items"""
+        while True:
+            entry = self._write_queue.get()
+            if entry is None:
+                return
+            stop = False
+            entries = [entry]
             while True:
-                resp = self.dynamodb.batch_write_item(RequestItems={self.table_name: chunk})
-                un = resp.get("UnprocessedItems", {}).get(self.table_name, [])
-                if not un:
+                try:
+                    more = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    stop = True
                     break
-                chunk = un
-                time.sleep(min(backoff, 4.0))
-                backoff *= 2
-            i += CHUNK
+                entries.append(more)
+
+            # a later flush of the same message wins; BatchWriteItem rejects duplicate keys
+            pending = {}
+            for _, items, _ in entries:
+                for it in items:
+                    pending[(it["thread_id"]["S"], it["seq"]["N"])] = it
+            try:
+                self._write_items(list(pending.values()))
+            except Exception as e:
+                print(f"[MemoryManager] Error writing {len(pending)} items to DynamoDB, keeping them for retry: {e}")
+                # remember before failing the futures, so a waiter's retry finds them
+                with self._write_lock:
+                    for thread_id, items, _ in entries:
+                        self._failed_items.setdefault(thread_id, []).extend(items)
+                for _, _, future in entries:
+                    future.set_exception(e)
+            else:
+                for _, _, future in entries:
+                    future.set_result(None)
+            if stop:
+                return
+
+    def _write_items(self, items: List[Dict[str, Any]]) -> None:
+        # chunk <= 25; chunks go out concurrently since BatchWriteItem calls are independent
+        CHUNK = 25
+        chunks = [[{"PutRequest": {"Item": it}} for it in items[i:i+CHUNK]] for i in range(0, len(items), CHUNK)]
+        if len(chunks) == 1:
+            self._write_chunk(chunks[0])
+            return
+        futures = []
+        for chunk in chunks:
+            try:
+                futures.append(self._chunk_executor.submit(self._write_chunk, chunk))
+            except RuntimeError:
+                # the pool refuses new work once the interpreter is exiting (atexit flush)
+                self._write_chunk(chunk)
+        errors = [e for e in (f.exception() for f in futures) if e is not None]
+        if errors:
+            raise errors[0]
+
+    def _write_chunk(self, chunk: List[Dict[str, Any]]) -> None:
+        # retry unprocessed items with jittered exponential backoff
+        backoff = 0.5
+        while True:
+            resp = self.dynamodb.batch_write_item(RequestItems={self.table_name: chunk})
+            un = resp.get("UnprocessedItems", {}).get(self.table_name, [])
+            if not un:
+                return
+            chunk = un
+            time.sleep(random.uniform(0, min(backoff, 4.0)))
+            backoff *= 2
 
 
     def on_session_start(self, thread_id: str) -> None:
@@ -218,9 +342,11 @@ class MemoryManager:
             
             # Load conversation state from DynamoDB into context
             if not thread_state.context_pairs:
+                # The read must see this thread's queued flushes (e.g. the idle flush above)
+                self._wait_for_writes(thread_id)
                 print(f"[MemoryManager] Loading conversation state from DynamoDB for thread {thread_id}")
                 pairs = load_conversation_state_from_dynamodb(self.dynamodb, thread_id)
-                thread_state.context_pairs = pairs
+                thread_state.context_pairs = deque(pairs, maxlen=CONTEXT_PAIRS)
                 
                 # Update next_seq and next_turn based on loaded data
                 if pairs:
@@ -302,15 +428,15 @@ class MemoryManager:
             # Move to next turn
             thread_state.next_turn += 1
             
+            # Evict oldest pair first if context is full
+            if len(thread_state.context_pairs) >= CONTEXT_PAIRS:
+                self._evict_oldest_pair_to_batch(thread_state)
+            
             # Add to context
             thread_state.context_pairs.append(completed_pair)
             print(f"[MemoryManager] Completed pair for thread {thread_id}, turn {completed_pair.turn}")
             print(f"[MemoryManager] Context now has {len(thread_state.context_pairs)} pairs")
             
-            # Evict oldest pair if context exceeds limit
-            if len(thread_state.context_pairs) > CONTEXT_PAIRS:
-                self._evict_oldest_pair_to_batch(thread_state)
-            
             # Check if batch needs flushing
             self._check_and_flush_batch(thread_state)
             
@@ -322,18 +448,27 @@ class MemoryManager:
         thread_state = self._get_thread_state(thread_id)
         
         with thread_state.lock:
-            messages = []
+            open_pair = thread_state.open_pair
+            # Sized up front: two messages per pair plus the open user message
+            messages = [None] * (2 * len(thread_state.context_pairs) + (1 if open_pair else 0))
+            i = 0
             
             # Add context pairs
             for pair in thread_state.context_pairs:
-                messages.extend(pair.to_messages())
+                for message in pair.to_messages():
+                    messages[i] = message
+                    i += 1
             
             # Add open pair user message if exists
-            if thread_state.open_pair:
-                messages.append({
-                    "role": thread_state.open_pair.user_message.role,
-                    "content": thread_state.open_pair.user_message.content
-                })
+            if open_pair:
+                messages[i] = {
+                    "role": open_pair.user_message.role,
+                    "content": open_pair.user_message.content
+                }
+                i += 1
+            
+            # Pairs loaded from DynamoDB may lack an assistant reply
+            del messages[i:]
             
             print(f"[MemoryManager] Generated {len(messages)} messages for LLM context (thread {thread_id})")
             return messages
@@ -356,7 +491,7 @@ class MemoryManager:
         
         with thread_state.lock:
             # Collect all pairs to flush
-            all_pairs = thread_state.context_pairs.copy()
+            all_pairs = list(thread_state.context_pairs)
             all_pairs.extend(thread_state.batch_pairs)
             
             # Add open pair if it exists and is complete
@@ -432,6 +567,21 @@ class MemoryManager:
                 except Exception as e:
                     print(f"[MemoryManager] Error saving thread {thread_id} during shutdown: {e}")
 
+            # Give items from failed writes one more attempt
+            with self._write_lock:
+                failed_threads = list(self._failed_items)
+            for thread_id in failed_threads:
+                self._enqueue_items(thread_id, [])
+
+            # Let the writer drain everything queued above, within what's left of the budget
+            if self._writer.is_alive():
+                self._write_queue.put(None)
+            self._writer.join(max(0.0, timeout_seconds - (time.time() - start_time)))
+            if self._writer.is_alive():
+                print(f"[MemoryManager] Shutdown: DynamoDB writer still busy, {self._write_queue.qsize()} batches not written")
+            elif self._failed_items:
+                print(f"[MemoryManager] Shutdown: writes failed for {len(self._failed_items)} threads, their items were not saved")
+
             print(f"[MemoryManager] Shutdown complete in {time.time() - start_time:.1f}s")
 
         except Exception as e:
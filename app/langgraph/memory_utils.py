@@ -4,9 +4,10 @@ Memory manager utility functions for DynamoDB operations and message handling.
 
 import os
 import time
-import json
+import orjson
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from collections import deque
+from typing import Deque, List, Dict, Any, Optional
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
 import boto3
@@ -22,9 +23,12 @@ SESSION_IDLE_SECONDS = int(os.getenv("SESSION_IDLE_SECONDS")) # 6 hours
 CONTEXT_PAIRS = int(os.getenv("CONTEXT_PAIRS"))
 BATCH_PAIRS = int(os.getenv("BATCH_PAIRS"))
 MAX_RAM_PAIRS = int(os.getenv("MAX_RAM_PAIRS"))
+WRITE_QUEUE_MAX = int(os.getenv("WRITE_QUEUE_MAX", "1000"))  # pending write batches before flushes block
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", "4"))  # parallel BatchWriteItem calls per drain
+WRITE_WAIT_SECONDS = float(os.getenv("WRITE_WAIT_SECONDS", "30"))  # max wait for a thread's writes before reloading it
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """Represents a single chat message"""
     role: str  # 'user' or 'assistant'
@@ -35,12 +39,14 @@ class Message:
     meta: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Pair:
     """Represents a user-assistant message pair"""
     turn: int
     user_message: Message
     assistant_message: Optional[Message] = None
+    # Completed pairs don't change, so their LLM dicts are built once and shared
+    _cached_messages: Optional[List[Dict[str, str]]] = field(default=None, init=False, repr=False, compare=False)
     
     @property
     def is_complete(self) -> bool:
@@ -48,10 +54,13 @@ class Pair:
         return self.assistant_message is not None
     
     def to_messages(self) -> List[Dict[str, str]]:
-        """Convert pair to list of message dicts for LLM"""
+        """Convert pair to list of message dicts for LLM (shared once complete; don't mutate)"""
+        if self._cached_messages is not None:
+            return self._cached_messages
         messages = [{"role": self.user_message.role, "content": self.user_message.content}]
         if self.assistant_message:
             messages.append({"role": self.assistant_message.role, "content": self.assistant_message.content})
+            self._cached_messages = messages
         return messages
     
     def to_langchain_messages(self) -> List[Any]:
@@ -70,10 +79,12 @@ class ThreadState:
     last_activity_at: float
     next_seq: int = 1
     next_turn: int = 1
-    context_pairs: List[Pair] = field(default_factory=list)
+    # Sliding window; evict to batch_pairs before appending, since a full deque drops silently
+    context_pairs: Deque[Pair] = field(default_factory=lambda: deque(maxlen=CONTEXT_PAIRS))
     batch_pairs: List[Pair] = field(default_factory=list)
     open_pair: Optional[Pair] = None
-    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Reentrant: on_session_start calls flush_all while already holding it
+    lock: threading.RLock = field(default_factory=threading.RLock)
 
 
 def get_now_iso() -> str:
@@ -225,7 +236,7 @@ def load_conversation_state_from_dynamodb(dynamodb_client, thread_id: str) -> Li
             
             # Parse the messages JSON
             messages_json = item.get('messages', {}).get('S', '[]')
-            messages = json.loads(messages_json)
+            messages = orjson.loads(messages_json)
             
             # Convert messages back to pairs
             pairs = []
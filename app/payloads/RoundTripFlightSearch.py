@@ -6,14 +6,15 @@ def RoundTripFlightSearch(origin: str, destination: str, departure_date: str, re
         carriers = ["TK"]  # Default to Turkish Airlines
     
     # Build passenger criteria
-    passenger_criteria = []
-    for i in range(number_of_passengers):
-        passenger_criteria.append({
+    passenger_criteria = [
+        {
             "@type": "PassengerCriteria",
-            "number": i + 1,
+            "number": i,
             "age": 25,
             "passengerTypeCode": "ADT"
-        })
+        }
+        for i in range(1, number_of_passengers + 1)
+    ]
 
     payload = {
         "@type": "CatalogProductOfferingsQueryRequest",
@@ -0,0 +1,32 @@
+"""
+Shared outbound HTTP client
+"""
+import os
+import threading
+
+import httpx
+
+# One keep-alive HTTP/2 pool for the OpenAI SDK and the LangGraph chat model, so
+# translation and graph calls multiplex over the same warm TLS connection
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "200"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "100"))
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide httpx client, building it on first use"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                    ),
+                    timeout=httpx.Timeout(60.0, connect=10.0),
+                )
+    return _client
@@ -1,19 +1,96 @@
 """
 Translation service using OpenAI for language detection and translation
 """
+import hashlib
 import os
-from typing import Optional, Tuple
+import re
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
 from openai import OpenAI
 from google.cloud import translate_v3 as translate
 
+from .http_client import get_http_client
+
+# Texts longer than this are rarely repeated, so they bypass the cache
+CACHE_MAX_TEXT_LENGTH = 2048
+
+
+class _LRUCache:
+    """Small thread-safe LRU; webhook handlers call the service from a threadpool"""
+    
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+    
+    def put(self, key: Hashable, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def _cache_key(op: str, text: str, language: str = "") -> Optional[Tuple[str, str, bytes]]:
+    """Fixed-size key (16-byte digest) so long messages don't bloat the cache; None = don't cache"""
+    if len(text) > CACHE_MAX_TEXT_LENGTH:
+        return None
+    return op, language, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+# Local English fast path: plain-ASCII text where enough words are common English
+# and none are common Roman Urdu (which is also ASCII) skips the remote detector.
+# Words shared with other Latin-script languages ("no", "me", "a", "was", ...)
+# are left out of the list, and at least two hits are required.
+ENGLISH_MIN_HIT_RATIO = 0.34
+ENGLISH_MIN_HITS = 2
+_WORD_RE = re.compile(r"[a-z']+")
+_COMMON_ENGLISH = frozenset("""
+about after and any are at be book booking can cheap cheapest could date dates day
+does fare find flight flights for from get going hello help how i'm it ok okay
+it's july june like looking march month my need next not of one or please price
+return show thank thanks that the there this ticket tickets to today tomorrow trip want we week what
+when where which with would yes you your
+""".split())
+_COMMON_ROMAN_URDU = frozenset("""
+aap acha ap bhai chahiye hai hain haan ho hona jana ka kab kal karna karo ke kesay ki kitna
+kitne ko kya liye main mein mujhe nahi nahin se sasta tak tha theek wala wali
+""".split())
+
+
+def _looks_english(text: str) -> bool:
+    """Cheap (<10µs) check for text that is confidently English"""
+    if not text.isascii():
+        return False
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return False
+    hits = 0
+    for word in words:
+        if word in _COMMON_ROMAN_URDU:
+            return False
+        if word in _COMMON_ENGLISH:
+            hits += 1
+    return hits >= ENGLISH_MIN_HITS and hits / len(words) >= ENGLISH_MIN_HIT_RATIO
+
 
 class TranslationService:
     """Handles language detection and translation using OpenAI"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=get_http_client())
         if not os.getenv('OPENAI_API_KEY'):
             print("⚠️ Warning: OPENAI_API_KEY not found in environment variables")
+        # Successful results only: repeat greetings and reply templates skip the API round-trip
+        self._cache = _LRUCache(maxsize=4096)
     
     def detect_language(self, text: str) -> str:
         """
@@ -25,6 +102,14 @@ class TranslationService:
         Returns:
             Language code (e.g., 'en', 'ur', 'es', 'fr', etc.) or 'en' as fallback
         """
+        if _looks_english(text):
+            return "en"
+        
+        key = _cache_key("detect", text)
+        cached = self._cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
@@ -44,6 +129,8 @@ class TranslationService:
             
             detected_language = response.choices[0].message.content.strip().lower()
             print(f"🌐 Detected language: {detected_language} for text: '{text[:50]}...'")
+            if key:
+                self._cache.put(key, detected_language)
             return detected_language
             
         except Exception as e:
@@ -64,6 +151,11 @@ class TranslationService:
         if source_language == "en":
             return text  # Already in English
         
+        key = _cache_key("to_en", text, source_language)
+        cached = self._cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
@@ -85,6 +177,8 @@ class TranslationService:
             
             translated_text = response.choices[0].message.content.strip()
             print(f"🔄 Translated to English: '{text[:30]}...' -> '{translated_text[:30]}...'")
+            if key:
+                self._cache.put(key, translated_text)
             return translated_text
             
         except Exception as e:
@@ -105,6 +199,11 @@ class TranslationService:
         if target_language == "en":
             return text  # Already in English
         
+        key = _cache_key("from_en", text, target_language)
+        cached = self._cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
@@ -123,6 +222,8 @@ class TranslationService:
             
             translated_text = response.choices[0].message.content.strip()
             print(f"🔄 Translated to {target_language}: '{text[:30]}...' -> '{translated_text[:30]}...'")
+            if key:
+                self._cache.put(key, translated_text)
             return translated_text
             
         except Exception as e:
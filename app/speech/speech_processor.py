@@ -9,13 +9,19 @@ from typing import Optional, Callable, Tuple, Dict, Any
 import requests
 import assemblyai as aai
 from openai import OpenAI
-import queue
-import threading
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
-# Global task queue for voice processing
-_voice_task_queue = queue.Queue()
-_voice_worker_thread = None
-_voice_worker_running = False
+from app.batching import thread_lock
+
+# Voice notes run concurrently up to MAX_CONCURRENT_VOICE; beyond MAX_PENDING_VOICE
+# (running + waiting) new ones are refused rather than queued without bound
+MAX_CONCURRENT_VOICE = int(os.getenv("MAX_CONCURRENT_VOICE", "8"))
+MAX_PENDING_VOICE = int(os.getenv("MAX_PENDING_VOICE", "100"))
+_voice_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_VOICE, thread_name_prefix="voice")
+_voice_semaphore = asyncio.Semaphore(MAX_CONCURRENT_VOICE)
+_voice_tasks: set = set()
 
 # SpeechGen.io TTS Client
 class SpeechGenClient:
@@ -333,49 +339,27 @@ class SpeechProcessor:
         """Check if OpenAI API key is configured"""
         return bool(os.getenv('OPENAI_API_KEY'))
 
-def _voice_worker():
-    """Background worker that processes voice tasks"""
-    global _voice_worker_running
-    _voice_worker_running = True
-    print("[VoiceProcessor] Background worker started")
-    
-    while _voice_worker_running:
+async def _bounded(thread_id: str, task_func: Callable, *args, **kwargs):
+    """Wait for the conversation's turn, then a voice slot, then run the blocking pipeline on the voice pool"""
+    # Same-thread notes queue here without holding a global slot
+    async with thread_lock(thread_id), _voice_semaphore:
+        print(f"[VoiceProcessor] Processing task: {task_func.__name__}")
+        loop = asyncio.get_running_loop()
         try:
-            task = _voice_task_queue.get(timeout=1.0)
-            if task is None:  # Shutdown signal
-                break
-            
-            task_func, args, kwargs = task
-            print(f"[VoiceProcessor] Processing task: {task_func.__name__}")
-            task_func(*args, **kwargs)
-            _voice_task_queue.task_done()
-            
-        except queue.Empty:
-            continue
+            await loop.run_in_executor(_voice_executor, functools.partial(task_func, *args, **kwargs))
         except Exception as e:
-            print(f"[VoiceProcessor] Error in background worker: {e}")
-    
-    _voice_worker_running = False
-    print("[VoiceProcessor] Background worker stopped")
+            print(f"[VoiceProcessor] Error in background task: {e}")
 
-def start_voice_worker():
-    """Start the background voice processing worker"""
-    global _voice_worker_thread, _voice_worker_running
-    
-    if _voice_worker_running:
-        return
-    
-    _voice_worker_thread = threading.Thread(target=_voice_worker, daemon=True)
-    _voice_worker_thread.start()
-    print("[VoiceProcessor] Background worker thread started")
-
-def queue_voice_task(task_func: Callable, *args, **kwargs):
-    """Add a voice processing task to the background queue"""
-    if not _voice_worker_running:
-        start_voice_worker()
+def queue_voice_task(thread_id: str, task_func: Callable, *args, **kwargs):
+    """Schedule a voice processing task on the running event loop; one at a time per thread_id"""
+    if len(_voice_tasks) >= MAX_PENDING_VOICE:
+        raise RuntimeError(f"Voice queue full ({len(_voice_tasks)} pending)")
     
     print(f"[VoiceProcessor] Queueing voice task")
-    _voice_task_queue.put((task_func, args, kwargs))
+    task = asyncio.get_running_loop().create_task(_bounded(thread_id, task_func, *args, **kwargs))
+    # Keep a reference until done; the loop only holds tasks weakly
+    _voice_tasks.add(task)
+    task.add_done_callback(_voice_tasks.discard)
 
 def process_voice_message_background(media_url: str, thread_id: str, from_number: str):
     """
@@ -406,9 +390,8 @@ def process_voice_message_background(media_url: str, thread_id: str, from_number
         print(f"[VoiceProcessor] Language: {detected_language}, Processing text: '{english_text[:50]}...'")
         
         # Step 3: Process through LangGraph with English text
-        from app.langgraph import create_graph, invoke_graph, extract_last_ai_text
-        graph = create_graph()
-        state = invoke_graph(graph, english_text, thread_id, is_voice=True, detected_language=detected_language)
+        from app.langgraph import get_graph, invoke_graph, extract_last_ai_text
+        state = invoke_graph(get_graph(), english_text, thread_id, is_voice=True, detected_language=detected_language)
         reply_text = extract_last_ai_text(state) or "Got it."
         
         # Step 4: Translate response back to detected language if needed
@@ -501,7 +484,4 @@ def send_twilio_voice_message(to_number: str, media_url: str):
         print(f"❌ Error sending Twilio voice message: {e}")
 
 # Global speech processor instance
-speech_processor = SpeechProcessor()
-
-# Start the background worker when module is imported
-start_voice_worker() 
\ No newline at end of file
+speech_processor = SpeechProcessor() 
\ No newline at end of file
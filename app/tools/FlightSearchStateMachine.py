@@ -3,10 +3,17 @@ FlightSearchStateMachine tool for managing flight search state and performing se
 """
 
 from langchain_core.tools import tool
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import re
+import sys
 from typing import Optional
 import asyncio
+import calendar
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 
 # Import required modules
 from ..statemachine.ConversationFlowSM import ConversationFlowSM
@@ -27,14 +34,53 @@ from .travelport_utils import (
     extract_return_duration
 )
 
-# State machine storage per thread
-state_machines = {}
+logger = logging.getLogger(__name__)
+
+# Return-ticket keywords: return(ing), round trip, roundtrip, round-trip
+_RETURN_RE = re.compile(r'\b(?:return|round[- ]?trip)', re.IGNORECASE)
+
+# Accepted spellings of each trip type
+_TRIP_TYPE_MAP = {
+    'oneway': 'one-way',
+    'one-way': 'one-way',
+    'one way': 'one-way',
+    'roundtrip': 'round-trip',
+    'round-trip': 'round-trip',
+    'round trip': 'round-trip',
+    'return': 'round-trip',
+}
+
+# State machine storage per thread, least recently used first
+MAX_STATE_MACHINES = 10_000
+state_machines: "OrderedDict[str, ConversationFlowSM]" = OrderedDict()
+_state_machines_lock = threading.Lock()
 
 def get_or_create_state_machine(thread_id: str) -> ConversationFlowSM:
     """Get existing state machine or create new one for thread"""
-    if thread_id not in state_machines:
-        state_machines[thread_id] = ConversationFlowSM()
-    return state_machines[thread_id]
+    with _state_machines_lock:
+        sm = state_machines.get(thread_id)
+        if sm is None:
+            sm = state_machines[thread_id] = ConversationFlowSM()
+            # Evict abandoned conversations so the dict can't grow without bound
+            while len(state_machines) > MAX_STATE_MACHINES:
+                state_machines.popitem(last=False)
+        else:
+            state_machines.move_to_end(thread_id)
+        return sm
+
+@lru_cache(maxsize=4096)
+def _resolve_city_cached(city_key: str) -> str:
+    """Resolve a normalized city phrase once; logging only happens on a cache miss"""
+    # Try to resolve the phrase to airport codes
+    preferred_code, all_codes = resolve_phrase_to_airports(city_key)
+    
+    if preferred_code:
+        logger.debug("[CityMapper] Resolved '%s' to IATA code '%s'", city_key, preferred_code)
+        return preferred_code
+    else:
+        # If no match found, keep the original (might already be an IATA code)
+        logger.debug("[CityMapper] No mapping found for '%s', keeping as-is", city_key)
+        return city_key.upper()
 
 def resolve_city_to_iata(city_input: str) -> str:
     """
@@ -44,16 +90,7 @@ def resolve_city_to_iata(city_input: str) -> str:
     if not city_input:
         return city_input
     
-    # Try to resolve the phrase to airport codes
-    preferred_code, all_codes = resolve_phrase_to_airports(city_input)
-    
-    if preferred_code:
-        print(f"[CityMapper] Resolved '{city_input}' to IATA code '{preferred_code}'")
-        return preferred_code
-    else:
-        # If no match found, keep the original (might already be an IATA code)
-        print(f"[CityMapper] No mapping found for '{city_input}', keeping as-is")
-        return city_input.upper()
+    return _resolve_city_cached(city_input.strip().lower())
 
 def format_duration(minutes: int) -> str:
     """Format duration in minutes to Xh Ym"""
@@ -107,12 +144,67 @@ def format_baggage_summary(baggage: dict) -> str:
     
     return " | ".join(parts)
 
+_YMD_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+
+# (year, month, day) of today plus the timestamp at which it goes stale (next midnight)
+_today_cache = {"ymd": (0, 0, 0), "expires": 0.0}
+
+def _today_ymd() -> tuple:
+    """Today's (year, month, day), recomputed only once per day"""
+    now = time.time()
+    if now >= _today_cache["expires"]:
+        today = date.today()
+        tomorrow = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _today_cache["ymd"] = (today.year, today.month, today.day)
+        _today_cache["expires"] = tomorrow.timestamp()
+    return _today_cache["ymd"]
+
+def fix_date_year(date_str: Optional[str]) -> Optional[str]:
+    """
+    Ensure date is in the future. A past date keeps its month/day and moves to
+    the current year if that is still upcoming, otherwise to next year.
+    """
+    if not date_str:
+        return date_str
+    m = _YMD_RE.match(date_str)
+    if not m:
+        return date_str
+    ymd = (int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    today = _today_ymd()
+    
+    # Common case: already today or later
+    if ymd >= today:
+        return date_str
+    
+    y0 = today[0]
+    y, mo, d = ymd
+    # Not a real date (e.g. 2025-13-45, 2025-02-30): leave it as it came in
+    if not (1 <= mo <= 12 and 1 <= d <= calendar.monthrange(y, mo)[1]):
+        return date_str
+    year = y0 if (y0, mo, d) >= today else y0 + 1
+    if mo == 2 and d == 29 and not calendar.isleap(year):
+        return date_str
+    return f"{year}-{mo:02d}-{d:02d}"
+
+def _reply(text: str, summary: Optional[dict] = None, trip_type: Optional[str] = None, status: str = "ok") -> dict:
+    """Build the FlightSearchStateMachine result so every path returns the same shape"""
+    return {
+        "text": text,
+        "summary": summary,
+        "trip_type": trip_type,
+        "status": status,
+    }
+
 def format_layovers(itinerary: dict) -> str:
-        lays = (itinerary or {}).get("layovers") or []
-        if not lays:
-            return ""
-        parts = [f"{l.get('airport_code') or l.get('city')} ({l.get('duration')})" for l in lays]
-        return "   Layover: " + ", ".join(parts) + "\n"
+    """Format layover airports and waits as a single indented line"""
+    lays = itinerary.get("layovers") if itinerary else None
+    if not lays:
+        return ""
+    parts = []
+    for lay in lays:
+        get = lay.get
+        parts.append(f"{get('airport_code') or get('city')} ({get('duration')})")
+    return f"   Layover: {', '.join(parts)}\n"
 
 
 @tool("FlightSearchStateMachine")
@@ -145,30 +237,6 @@ def FlightSearchStateMachine(
     - Otherwise, use comprehensive default carrier list for broader search results
     """
     
-    def fix_date_year(date_str):
-        """Ensure date is in the future - if in past, move to next year"""
-        if not date_str:
-            return date_str
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-            today = datetime.now().date()
-            
-            # If the date is in the past, move it to next year
-            if date_obj < today:
-                next_year_date = date_obj.replace(year=today.year + 1)
-                return next_year_date.strftime('%Y-%m-%d')
-            elif date_obj.year < today.year:
-                # If year is definitely wrong (like 2023), use current year
-                current_year_date = date_obj.replace(year=today.year)
-                if current_year_date < today:
-                    next_year_date = date_obj.replace(year=today.year + 1)
-                    return next_year_date.strftime('%Y-%m-%d')
-                else:
-                    return current_year_date.strftime('%Y-%m-%d')
-            return date_str
-        except:
-            return date_str
-    
     # Get state machine for this thread
     sm = get_or_create_state_machine(thread_id)
     
@@ -179,13 +247,16 @@ def FlightSearchStateMachine(
     # Parse carrier preference from user input
     preferred_carriers = parse_carrier_preference(user_input_text) if user_input_text else DEFAULT_PREFERRED_CARRIERS
     
-    # Update provided fields with city-to-IATA mapping
+    # Update provided fields with city-to-IATA mapping. Codes are interned so a
+    # value repeated across turns is an identity check and skips set_variable.
     if origin:
-        iata_origin = resolve_city_to_iata(origin)
-        sm.set_variable('origin', iata_origin)
+        iata_origin = sys.intern(resolve_city_to_iata(origin))
+        if iata_origin is not sm.origin:
+            sm.set_variable('origin', iata_origin)
     if destination:
-        iata_destination = resolve_city_to_iata(destination)
-        sm.set_variable('destination', iata_destination)
+        iata_destination = sys.intern(resolve_city_to_iata(destination))
+        if iata_destination is not sm.destination:
+            sm.set_variable('destination', iata_destination)
     if departure_date:
         corrected_departure = fix_date_year(departure_date)
         sm.set_variable('departure_date', corrected_departure)
@@ -197,10 +268,7 @@ def FlightSearchStateMachine(
     if type_of_trip:
         # Normalize trip type variations
         normalized_trip_type = type_of_trip.lower().strip()
-        if normalized_trip_type in ['oneway', 'one-way', 'one way']:
-            normalized_trip_type = 'one-way'
-        elif normalized_trip_type in ['roundtrip', 'round-trip', 'round trip', 'return']:
-            normalized_trip_type = 'round-trip'
+        normalized_trip_type = _TRIP_TYPE_MAP.get(normalized_trip_type, normalized_trip_type)
         sm.set_variable('type_of_trip', normalized_trip_type)
     
     # Set detected language and mode of conversation
@@ -242,34 +310,19 @@ def FlightSearchStateMachine(
                         outbound = summary.get("outbound", {})
                         inbound = summary.get("inbound", {})
                         
-                        response = f"✈️ Round-trip flight found: {price['total']} {price['currency']}\n\n"
-                        return {
-                            "text": response,           # unchanged human text for the LLM
-                            "summary": summary,         # structured data your formatter needs
-                            "trip_type": sm.type_of_trip
-                        }
-                        if outbound:
-                            duration = format_duration(outbound.get("duration_minutes_total"))
-                            stops = format_stops(outbound.get("stops_total", 0))
-                            response += f"🛫 Outbound: {duration}, {stops}\n"
-                            if outbound.get("baggage"):
-                                response += f"   Baggage: {format_baggage_summary(outbound['baggage'])}\n"
-                            lf = format_layovers(outbound.get("itinerary"))
-                            if lf:
-                                response += lf
-                        
-                        if inbound:
-                            duration = format_duration(inbound.get("duration_minutes_total"))
-                            stops = format_stops(inbound.get("stops_total", 0))
-                            response += f"🛬 Return: {duration}, {stops}\n"
-                            if inbound.get("baggage"):
-                                response += f"   Baggage: {format_baggage_summary(inbound['baggage'])}\n"
-                            lf = format_layovers(inbound.get("itinerary"))
+                        parts = [f"✈️ Round-trip flight found: {price['total']} {price['currency']}\n\n"]
+                        for label, leg in (("🛫 Outbound", outbound), ("🛬 Return", inbound)):
+                            if not leg:
+                                continue
+                            duration = format_duration(leg.get("duration_minutes_total"))
+                            stops = format_stops(leg.get("stops_total", 0))
+                            parts.append(f"{label}: {duration}, {stops}\n")
+                            if leg.get("baggage"):
+                                parts.append(f"   Baggage: {format_baggage_summary(leg['baggage'])}\n")
+                            lf = format_layovers(leg.get("itinerary"))
                             if lf:
-                                response += lf
-                        # Reset state machine after successful search
-                        state_machines[thread_id] = ConversationFlowSM()
-                        return response
+                                parts.append(lf)
+                        return _reply("".join(parts), summary, sm.type_of_trip)
                     else:  # One-way
                         price = summary.get("price", {})
                         price_text = f"{price.get('total')} {price.get('currency')}" if price.get('total') else "Price not available"
@@ -277,37 +330,54 @@ def FlightSearchStateMachine(
                         duration = format_duration(summary.get("duration_minutes_total"))
                         stops = format_stops(summary.get("stops_total", 0))
                         
-                        response = f"✈️ One-way flight found: {price_text}\n"
-                        response += f"🛫 Flight: {duration}, {stops}\n"
+                        parts = [
+                            f"✈️ One-way flight found: {price_text}\n",
+                            f"🛫 Flight: {duration}, {stops}\n",
+                        ]
                         it = (summary.get("itinerary") or {})
                         
                         if it.get("airlines"):
-                            response += f"Airline: {it['airlines']}\n"
+                            parts.append(f"Airline: {it['airlines']}\n")
                         if it.get("flight_numbers"):
-                            response += f"Flight no.: {it['flight_numbers']}\n"
+                            parts.append(f"Flight no.: {it['flight_numbers']}\n")
                         lf = format_layovers(it)
                         if lf:
-                            response += lf
+                            parts.append(lf)
                         
                         if summary.get("baggage"):
-                            response += f"Baggage: {format_baggage_summary(summary['baggage'])}\n"
+                            parts.append(f"Baggage: {format_baggage_summary(summary['baggage'])}\n")
                         
-                        # Reset state machine after successful search
-                        state_machines[thread_id] = ConversationFlowSM()
-                        return response
+                        return _reply("".join(parts), summary, sm.type_of_trip)
                 
                 # Fallback if no summary
-                # Reset state machine after successful search
-                state_machines[thread_id] = ConversationFlowSM()
-                return f"Flight search completed! Found flights for {sm.origin} to {sm.destination} on {sm.departure_date}."
+                return _reply(
+                    f"Flight search completed! Found flights for {sm.origin} to {sm.destination} on {sm.departure_date}.",
+                    trip_type=sm.type_of_trip,
+                )
             else:
-                return f"Sorry, I couldn't find flights. Error: {result.get('error', 'Unknown error')}"
+                return _reply(
+                    f"Sorry, I couldn't find flights. Error: {result.get('error', 'Unknown error')}",
+                    trip_type=sm.type_of_trip,
+                    status="error",
+                )
                 
         except Exception as e:
-            return f"Sorry, there was an error searching for flights: {str(e)}"
+            return _reply(
+                f"Sorry, there was an error searching for flights: {str(e)}",
+                trip_type=sm.type_of_trip,
+                status="error",
+            )
+        finally:
+            # A completed search always frees this thread's state
+            with _state_machines_lock:
+                state_machines.pop(thread_id, None)
     else:
         missing = sm.get_missing_variables()
-        return f"Flight search in progress. Still need: {', '.join(missing)}. Please provide these details to continue."
+        return _reply(
+            f"Flight search in progress. Still need: {', '.join(missing)}. Please provide these details to continue.",
+            trip_type=sm.type_of_trip,
+            status="incomplete",
+        )
 
 
 @tool("BulkFlightSearch")
@@ -349,7 +419,7 @@ def BulkFlightSearch(
     # Early check for duplicate searches after city resolution
     search_key = f"{thread_id}:{origin}:{destination}"
     from .travelport_utils import _active_searches
-    if any(key.startswith(search_key) for key in _active_searches):
+    if search_key in _active_searches:
         return "I'm already processing a bulk search for this route. Please wait for the current search to complete."
     
     # Check if we have minimum required information
@@ -369,7 +439,7 @@ def BulkFlightSearch(
     
     # Check if user wants return tickets
     return_duration = extract_return_duration(user_input_text)
-    wants_return = any(keyword in user_input_text.lower() for keyword in ['return', 'round trip', 'roundtrip', 'round-trip'])
+    wants_return = bool(_RETURN_RE.search(user_input_text))
     
     # Determine trip type
     trip_type = "one-way"
@@ -387,10 +457,10 @@ Without return duration specified, I'll search for one-way tickets only."""
         from .travelport_utils import queue_bulk_search_task, execute_bulk_search_background
         
         # For date ranges larger than 5, use background processing to avoid timeout
-        print(f"[BulkFlightSearch] Thread ID received: {thread_id}")
+        logger.debug("[BulkFlightSearch] Thread ID received: %s", thread_id)
         if len(dates) > 5:
             # Queue the search task for background execution
-            print(f"[BulkFlightSearch] Queueing background task with thread_id: {thread_id}")
+            logger.debug("[BulkFlightSearch] Queueing background task with thread_id: %s", thread_id)
             queue_bulk_search_task(
                 execute_bulk_search_background,
                 origin=origin,
@@ -423,7 +493,7 @@ Without return duration specified, I'll search for one-way tickets only."""
                     if translated_response:
                         response = translated_response
                 except Exception as e:
-                    print(f"[BulkFlightSearch] Translation failed: {e}")
+                    logger.warning("[BulkFlightSearch] Translation failed: %s", e)
             
             return response
         
@@ -450,7 +520,7 @@ Without return duration specified, I'll search for one-way tickets only."""
                         if translated_error:
                             error_msg = translated_error
                     except Exception as e:
-                        print(f"[BulkFlightSearch] Translation failed: {e}")
+                        logger.warning("[BulkFlightSearch] Translation failed: %s", e)
                 return error_msg
             
             cheapest = bulk_result.get("cheapest_result")
@@ -464,7 +534,7 @@ Without return duration specified, I'll search for one-way tickets only."""
                         if translated_error:
                             error_msg = translated_error
                     except Exception as e:
-                        print(f"[BulkFlightSearch] Translation failed: {e}")
+                        logger.warning("[BulkFlightSearch] Translation failed: %s", e)
                 return error_msg
             
             # Format the result (same as before for small searches)
@@ -477,32 +547,36 @@ Without return duration specified, I'll search for one-way tickets only."""
             duration = format_duration(summary.get("duration_minutes_total"))
             stops = format_stops(summary.get("stops_total", 0))
             
-            response = f"🎯 CHEAPEST OPTION FOUND!\n\n"
-            response += f"✈️ {origin} → {destination} on {search_date}\n"
-            response += f"💰 Price: {price_text}\n"
-            response += f"⏱️ Duration: {duration}, {stops}\n"
+            parts = [
+                "🎯 CHEAPEST OPTION FOUND!\n\n",
+                f"✈️ {origin} → {destination} on {search_date}\n",
+                f"💰 Price: {price_text}\n",
+                f"⏱️ Duration: {duration}, {stops}\n",
+            ]
             
             it = summary.get("itinerary", {})
             if it.get("airlines"):
-                response += f"🏢 Airline: {it['airlines']}\n"
+                parts.append(f"🏢 Airline: {it['airlines']}\n")
             if it.get("flight_numbers"):
-                response += f"🔢 Flight: {it['flight_numbers']}\n"
+                parts.append(f"🔢 Flight: {it['flight_numbers']}\n")
             
             # Add layover info
             lf = format_layovers(it)
             if lf:
-                response += lf
+                parts.append(lf)
             
             if summary.get("baggage"):
-                response += f"🧳 Baggage: {format_baggage_summary(summary['baggage'])}\n"
+                parts.append(f"🧳 Baggage: {format_baggage_summary(summary['baggage'])}\n")
             
-            response += f"\n📊 Search Summary: {bulk_result.get('search_summary')}"
+            parts.append(f"\n📊 Search Summary: {bulk_result.get('search_summary')}")
             
             # Handle return trip if requested
             if return_duration:
                 from .travelport_utils import calculate_return_date
                 return_date = calculate_return_date(search_date, return_duration)
-                response += f"\n\n🔄 For return trip {return_duration} days later ({return_date}), would you like me to search for return flights?"
+                parts.append(f"\n\n🔄 For return trip {return_duration} days later ({return_date}), would you like me to search for return flights?")
+            
+            response = "".join(parts)
             
             # Translate response if user language is not English
             if detected_language != "en":
@@ -512,7 +586,7 @@ Without return duration specified, I'll search for one-way tickets only."""
                     if translated_response:
                         response = translated_response
                 except Exception as e:
-                    print(f"[BulkFlightSearch] Translation failed: {e}")
+                    logger.warning("[BulkFlightSearch] Translation failed: %s", e)
             
             return response
         
@@ -526,7 +600,7 @@ Without return duration specified, I'll search for one-way tickets only."""
                 if translated_error:
                     error_msg = translated_error
             except Exception as trans_e:
-                print(f"[BulkFlightSearch] Translation failed: {trans_e}")
+                logger.warning("[BulkFlightSearch] Translation failed: %s", trans_e)
         return error_msg
 
 
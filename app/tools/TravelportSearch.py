@@ -1,7 +1,12 @@
 from langchain_core.tools import tool
 from dotenv import load_dotenv
 import os
+import threading
+import time
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Any, Dict, List, Optional, Tuple
 
 # Import utility functions from the new utils module
@@ -18,21 +23,45 @@ except ImportError:
         extract_cheapest_round_trip_summary
     )
 
-@tool("TravelportSearch")
-def TravelportSearch(payload: dict, trip_type: str = "one-way"):
-    """This tool calls the travelport rest api to get the cheapest flight possible for the user's given parameters"""
-    load_dotenv()  # Reads .env in current directory
+load_dotenv()  # Reads .env in current directory
+
+CLIENT_ID       = os.getenv("TRAVELPORT_CLIENT_ID")
+CLIENT_SECRET   = os.getenv("TRAVELPORT_CLIENT_SECRET")
+USERNAME        = os.getenv("TRAVELPORT_USERNAME")
+PASSWORD        = os.getenv("TRAVELPORT_PASSWORD")
+ACCESS_GROUP    = os.getenv("TRAVELPORT_ACCESS_GROUP")
+
+OAUTH_URL       = "https://oauth.pp.travelport.com/oauth/oauth20/token"
+CATALOG_URL     = "https://api.pp.travelport.com/11/air/catalog/search/catalogproductofferings"
+
+# Advertise brotli only when a decoder is installed; requests/httpx use it transparently
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
 
-    CLIENT_ID       = os.getenv("TRAVELPORT_CLIENT_ID")
-    CLIENT_SECRET   = os.getenv("TRAVELPORT_CLIENT_SECRET")
-    USERNAME        = os.getenv("TRAVELPORT_USERNAME")
-    PASSWORD        = os.getenv("TRAVELPORT_PASSWORD")
-    ACCESS_GROUP    = os.getenv("TRAVELPORT_ACCESS_GROUP")
+# Refresh the token this many seconds before Travelport expires it
+TOKEN_EXPIRY_MARGIN = 60
 
-    OAUTH_URL       = "https://oauth.pp.travelport.com/oauth/oauth20/token"
-    CATALOG_URL     = "https://api.pp.travelport.com/11/air/catalog/search/catalogproductofferings"
+# Shared keep-alive session so bulk searches reuse TCP/TLS connections
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
+_token_cache = {"token": None, "exp": 0.0}
+_token_lock = threading.Lock()
+
+
+def fetch_password_token() -> str:
+    """Return a cached OAuth bearer token, fetching a new one shortly before expiry"""
+    if _token_cache["token"] and time.time() < _token_cache["exp"]:
+        return _token_cache["token"]
+
+    with _token_lock:
+        # Another thread may have refreshed while we waited for the lock
+        if _token_cache["token"] and time.time() < _token_cache["exp"]:
+            return _token_cache["token"]
 
-    def fetch_password_token():
         data = {
             "grant_type":    "password",
             "username":      USERNAME,
@@ -41,27 +70,32 @@ def TravelportSearch(payload: dict, trip_type: str = "one-way"):
             "client_secret": CLIENT_SECRET,
             "scope":         "openid"
         }
-        resp = requests.post(
+        resp = _session.post(
             OAUTH_URL,
             headers={"Content-Type": "application/x-www-form-urlencoded"},
             data=data
         )
         resp.raise_for_status()
-        return resp.json()["access_token"]
+        token_data = orjson.loads(resp.content)
+        expires_in = float(token_data.get("expires_in") or 0)
+        _token_cache["token"] = token_data["access_token"]
+        _token_cache["exp"] = time.time() + expires_in - TOKEN_EXPIRY_MARGIN
+        return _token_cache["token"]
 
-    try:
-        token = fetch_password_token()
-    except Exception as e:
-        return {
-            "ok": False,
-            "error": f"Failed to obtain OAuth token: {str(e)}",
-            "summary": None
-        }
 
-    headers = {
+def invalidate_token() -> None:
+    """Drop the cached token so the next call re-authenticates"""
+    with _token_lock:
+        _token_cache["token"] = None
+        _token_cache["exp"] = 0.0
+
+
+def _catalog_headers(token: str) -> Dict[str, str]:
+    """Headers for a catalog search with the given bearer token"""
+    return {
         "Accept":                       "application/json",
         "Content-Type":                 "application/json",
-        "Accept-Encoding":              "gzip, deflate",
+        "Accept-Encoding":              ACCEPT_ENCODING,
         "Cache-Control":                "no-cache",
         "Authorization":                f"Bearer {token}",
         "XAUTH_TRAVELPORT_ACCESSGROUP": ACCESS_GROUP,
@@ -69,29 +103,48 @@ def TravelportSearch(payload: dict, trip_type: str = "one-way"):
         "Content-Version":              "11",
     }
 
+
+def _search_result(resp_json: Dict[str, Any], trip_type: str) -> Dict[str, Any]:
+    """Build the tool result from a parsed catalog response"""
+    # Extract summary based on trip type
+    if trip_type == "one-way":
+        summary = extract_cheapest_one_way_summary(resp_json)
+    else:
+        summary = extract_cheapest_round_trip_summary(resp_json)
+    
+    # Legacy price extraction for backwards compatibility
     try:
-        response = requests.post(CATALOG_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        resp_json = response.json()
-        
-        # Extract summary based on trip type
-        if trip_type == "one-way":
-            summary = extract_cheapest_one_way_summary(resp_json)
-        else:
-            summary = extract_cheapest_round_trip_summary(resp_json)
-        
-        # Legacy price extraction for backwards compatibility
-        try:
-            cheapest_flight_price = resp_json["CatalogProductOfferingsResponse"]["CatalogProductOfferings"]["CatalogProductOffering"][0]["ProductBrandOptions"][0]["ProductBrandOffering"][0]["BestCombinablePrice"]["TotalPrice"]
-        except (KeyError, IndexError):
-            cheapest_flight_price = None
+        cheapest_flight_price = resp_json["CatalogProductOfferingsResponse"]["CatalogProductOfferings"]["CatalogProductOffering"][0]["ProductBrandOptions"][0]["ProductBrandOffering"][0]["BestCombinablePrice"]["TotalPrice"]
+    except (KeyError, IndexError):
+        cheapest_flight_price = None
 
+    return {
+        "ok": True,
+        "price": cheapest_flight_price,
+        "raw": resp_json,
+        "summary": summary
+    }
+
+
+@tool("TravelportSearch")
+def TravelportSearch(payload: dict, trip_type: str = "one-way"):
+    """This tool calls the travelport rest api to get the cheapest flight possible for the user's given parameters"""
+    try:
+        token = fetch_password_token()
+    except Exception as e:
         return {
-            "ok": True,
-            "price": cheapest_flight_price,
-            "raw": resp_json,
-            "summary": summary
+            "ok": False,
+            "error": f"Failed to obtain OAuth token: {str(e)}",
+            "summary": None
         }
+
+    try:
+        response = _session.post(CATALOG_URL, headers=_catalog_headers(token), data=orjson.dumps(payload))
+        if response.status_code == 401:
+            # Token revoked or expired early; don't keep reusing it
+            invalidate_token()
+        response.raise_for_status()
+        return _search_result(orjson.loads(response.content), trip_type)
         
     except requests.HTTPError as e:
         return {
@@ -105,3 +158,40 @@ def TravelportSearch(payload: dict, trip_type: str = "one-way"):
             "error": f"Unexpected error: {str(e)}",
             "summary": None
         }
+
+
+def create_async_client() -> httpx.AsyncClient:
+    """Async HTTP/2 client sized for concurrent bulk catalog searches"""
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=0,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    )
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(60.0))
+
+
+async def TravelportSearchAsync(payload: dict, trip_type: str, client: httpx.AsyncClient, token: str) -> Dict[str, Any]:
+    """
+    Async counterpart of TravelportSearch for bulk searches.
+    The caller owns the shared client and passes a token from fetch_password_token().
+    Returns the same dict shape as TravelportSearch.
+    """
+    try:
+        response = await client.post(CATALOG_URL, headers=_catalog_headers(token), content=orjson.dumps(payload))
+        if response.status_code == 401:
+            invalidate_token()
+        response.raise_for_status()
+        return _search_result(orjson.loads(response.content), trip_type)
+
+    except httpx.HTTPStatusError as e:
+        return {
+            "ok": False,
+            "error": f"API request failed: {str(e)} - {e.response.text}",
+            "summary": None
+        }
+    except Exception as e:
+        return {
+            "ok": False,
+            "error": f"Unexpected error: {str(e)}",
+            "summary": None
+        }
@@ -2,6 +2,9 @@
 Comprehensive list of airline IATA codes used in flight search payloads
 """
 
+import re
+from functools import lru_cache
+
 # Complete airline codes with their full names for reference
 AIRLINE_CODES = {
     # Major US Carriers
@@ -68,7 +71,7 @@ AIRLINE_CODES = {
 }
 
 # Default preferred carriers list (comprehensive coverage)
-DEFAULT_PREFERRED_CARRIERS = [
+DEFAULT_PREFERRED_CARRIERS = (
     # Major International Carriers
     "AA", "DL", "UA", "LH", "BA", "AF", "KL", "EK", "QR", "SQ", 
     "CX", "TK", "AC", "NH", "JL", "AZ", "LX", "OS", "SN", "SK",
@@ -78,11 +81,27 @@ DEFAULT_PREFERRED_CARRIERS = [
     "FR", "U2", "WN", "B6", "NK", "F9", "G4", "SY", "PC", "XY",
     # Additional Major Carriers
     "IB", "AY", "KE", "ZH", "MU", "CA", "CZ", "FM", "HU", "9W"
-]
+)
+DEFAULT_PREFERRED_CARRIERS_SET = frozenset(DEFAULT_PREFERRED_CARRIERS)
+
+# Every default carrier must be a known code so typos never reach Travelport
+assert DEFAULT_PREFERRED_CARRIERS_SET <= AIRLINE_CODES.keys(), (
+    f"Unknown default carriers: {sorted(DEFAULT_PREFERRED_CARRIERS_SET - AIRLINE_CODES.keys())}"
+)
 
 
 def get_airline_name(code: str) -> str:
     """Get the full airline name from IATA code"""
+    # Codes are almost always upper-case already; skip the .upper() copy then
+    name = AIRLINE_CODES.get(code)
+    if name is not None:
+        return name
+    return _airline_name_slow(code)
+
+
+@lru_cache(maxsize=256)
+def _airline_name_slow(code: str) -> str:
+    """Lower-case or unknown codes; cached so repeats don't re-format"""
     return AIRLINE_CODES.get(code.upper(), f"Unknown Airline ({code})")
 
 
@@ -91,56 +110,70 @@ def get_all_carrier_codes() -> list:
     return list(AIRLINE_CODES.keys())
 
 
+# Airline codes grouped by region
+_REGIONS = {
+    "us": ("AA", "DL", "UA", "WN", "B6", "NK", "F9"),
+    "europe": ("LH", "BA", "AF", "KL", "AZ", "LX", "OS", "SN", "SK", "IB", "AY", "FR", "U2"),
+    "middle_east": ("EK", "QR", "EY", "GF", "SV", "MS", "RJ", "WY"),
+    "asia": ("SQ", "CX", "TK", "NH", "JL", "TG", "CI", "BR", "PR", "KE", "ZH", "MU", "CA", "CZ", "FM", "HU", "9W"),
+    "low_cost": ("FR", "U2", "WN", "B6", "NK", "F9", "G4", "SY", "PC", "XY")
+}
+
+
 def get_carriers_by_region(region: str) -> list:
     """Get airline codes by region"""
-    regions = {
-        "us": ["AA", "DL", "UA", "WN", "B6", "NK", "F9"],
-        "europe": ["LH", "BA", "AF", "KL", "AZ", "LX", "OS", "SN", "SK", "IB", "AY", "FR", "U2"],
-        "middle_east": ["EK", "QR", "EY", "GF", "SV", "MS", "RJ", "WY"],
-        "asia": ["SQ", "CX", "TK", "NH", "JL", "TG", "CI", "BR", "PR", "KE", "ZH", "MU", "CA", "CZ", "FM", "HU", "9W"],
-        "low_cost": ["FR", "U2", "WN", "B6", "NK", "F9", "G4", "SY", "PC", "XY"]
-    }
-    return regions.get(region.lower(), [])
+    return list(_REGIONS.get(region.lower(), ()))
 
 
+# Airline name variations checked before codes (longer matches first)
+_AIRLINE_VARIATIONS = {
+    "QATAR AIRWAYS": "QR",
+    "QATAR": "QR", 
+    "EMIRATES": "EK",
+    "TURKISH AIRLINES": "TK",
+    "TURKISH": "TK",
+    "LUFTHANSA": "LH",
+    "BRITISH AIRWAYS": "BA",
+    "AIR FRANCE": "AF",
+    "KLM": "KL",
+    "AMERICAN AIRLINES": "AA",
+    "AMERICAN": "AA",
+    "DELTA AIR LINES": "DL",
+    "DELTA": "DL",
+    "UNITED": "UA",
+    "RYANAIR": "FR",
+    "EASYJET": "U2"
+}
+_AIRLINE_VARIATIONS_SORTED = sorted(_AIRLINE_VARIATIONS.items(), key=lambda kv: -len(kv[0]))
+
+# Single-pass matchers: one alternation over all codes (word-bounded) and one
+# over all upper-cased names, mapped back to the code
+_CODE_RE = re.compile(r'\b(' + '|'.join(re.escape(code) for code in AIRLINE_CODES) + r')\b')
+_NAME_TO_CODE = {name.upper(): code for code, name in AIRLINE_CODES.items()}
+_NAME_RE = re.compile('|'.join(
+    re.escape(name) for name in sorted(_NAME_TO_CODE, key=len, reverse=True)
+))
+
 def parse_carrier_preference(user_input: str) -> list:
     """Parse carrier preference from user input"""
-    user_input_upper = user_input.upper()
-    
-    # Check for airline name variations first (more specific matches)
-    airline_variations = {
-        "QATAR AIRWAYS": "QR",
-        "QATAR": "QR", 
-        "EMIRATES": "EK",
-        "TURKISH AIRLINES": "TK",
-        "TURKISH": "TK",
-        "LUFTHANSA": "LH",
-        "BRITISH AIRWAYS": "BA",
-        "AIR FRANCE": "AF",
-        "KLM": "KL",
-        "AMERICAN AIRLINES": "AA",
-        "AMERICAN": "AA",
-        "DELTA AIR LINES": "DL",
-        "DELTA": "DL",
-        "UNITED": "UA",
-        "RYANAIR": "FR",
-        "EASYJET": "U2"
-    }
-    
-    # Check variations first (longer matches first)
-    for variation in sorted(airline_variations.keys(), key=len, reverse=True):
-        if variation in user_input_upper:
-            return [airline_variations[variation]]
-    
-    # Check for specific airline code mentions (exact word boundaries)
-    import re
-    for code, name in AIRLINE_CODES.items():
-        # Check for exact code match with word boundaries
-        if re.search(r'\b' + re.escape(code) + r'\b', user_input_upper):
-            return [code]
+    # Nothing to match without letters (e.g. "2" or "15/11")
+    if any(ch.isalpha() for ch in user_input):
+        user_input_upper = user_input.upper()
+        
+        # Check variations first (longer matches first)
+        for variation, code in _AIRLINE_VARIATIONS_SORTED:
+            if variation in user_input_upper:
+                return [code]
+        
+        # Check for specific airline code mentions (exact word boundaries)
+        match = _CODE_RE.search(user_input_upper)
+        if match:
+            return [match.group(1)]
+        
         # Check for full airline name (case insensitive)
-        if name.upper() in user_input_upper:
-            return [code]
+        match = _NAME_RE.search(user_input_upper)
+        if match:
+            return [_NAME_TO_CODE[match.group(0)]]
     
     # Default to comprehensive carrier list
-    return DEFAULT_PREFERRED_CARRIERS 
\ No newline at end of file
+    return list(DEFAULT_PREFERRED_CARRIERS)
@@ -7,9 +7,13 @@ Matches the shapes expected by FlightSearchStateMachine without changing other f
 from __future__ import annotations
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache, partial
+from itertools import chain
+from operator import itemgetter
+import logging
 import re
-import ast
-import json
+
+logger = logging.getLogger(__name__)
 
 
 # ------------------------------
@@ -22,6 +26,24 @@ except Exception:
     # fallback if someone runs this module directly
     from airline_codes import get_airline_name
 
+# Payload builders are plain functions with no back-references, so they can be
+# bound once here. TravelportSearch stays a lazy import: it imports this module.
+try:
+    from ..payloads.OneWayFlightSearch import OneWayFlightSearch
+    from ..payloads.RoundTripFlightSearch import RoundTripFlightSearch
+except ImportError:
+    # running outside the package: the bulk helpers are unavailable anyway
+    OneWayFlightSearch = RoundTripFlightSearch = None
+
+
+@lru_cache(maxsize=1024)
+def _airline_name_cached(code: str) -> str:
+    """Airline display name for a carrier code, falling back to the code itself."""
+    try:
+        return get_airline_name(code)
+    except Exception:
+        return code
+
 
 # ------------------------------
 # Time / duration helpers (old impl behavior)
@@ -30,17 +52,40 @@ def _parse_iso_duration_minutes(duration_str: Optional[str]) -> int:
     """Parse ISO 8601 duration like 'PT3H40M' to minutes."""
     if not duration_str or not isinstance(duration_str, str):
         return 0
-    m = re.match(r'^PT(?:(\d+)H)?(?:(\d+)M)?', duration_str)
-    if not m:
+    return _iso_duration_minutes_cached(duration_str)
+
+@lru_cache(maxsize=4096)
+def _iso_duration_minutes_cached(duration_str: str) -> int:
+    # the same few duration strings repeat across segments and responses
+    if duration_str[:2] != "PT":
         return 0
-    h = int(m.group(1) or 0)
-    mm = int(m.group(2) or 0)
+    # Single pass: accumulate digits, assign on the H / M designators
+    h = mm = n = 0
+    for c in duration_str[2:]:
+        d = ord(c) - 48
+        if 0 <= d <= 9:
+            n = n * 10 + d
+        elif c == "H":
+            h, n = n, 0
+        elif c == "M":
+            mm, n = n, 0
+        else:
+            n = 0
     return h * 60 + mm
 
 def _human_minutes(mins: int) -> str:
-    h, m = divmod(int(mins), 60)
+    return _human_minutes_cached(int(mins))
+
+@lru_cache(maxsize=2048)
+def _human_minutes_cached(mins: int) -> str:
+    # layover and flight durations cluster in a narrow range of minute values
+    h, m = divmod(mins, 60)
     return f"{h}h {m}m" if h else f"{m}m"
 
+# Canonical 'YYYY-MM-DD[T ]HH:MM[:SS]' shape, parsed without strptime
+_DT_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})(?::(\d{2}))?")
+_TZ_RE = re.compile(r"(?:Z|[+-]\d{2}(?::?\d{2})?)$")
+
 def _parse_dt(date_str: str, time_str: str):
     """
     Accepts 'YYYY-MM-DD' + 'HH:MM' or 'HH:MM:SS', and ISO forms like 'YYYY-MM-DDTHH:MM[:SS][Z]'.
@@ -54,15 +99,30 @@ def _parse_dt(date_str: str, time_str: str):
 
     if not dt_text:
         return None
+    return _parse_dt_text(dt_text)
+
+@lru_cache(maxsize=4096)
+def _parse_dt_text(dt_text: str):
+    """Parse an assembled date-time string (cached: segment times repeat across offerings)."""
+    # strip trailing Z or timezone offset if present (we treat times as local),
+    # e.g. 2025-11-07T08:05:00Z / +04:00 / -02:00 / -0200
+    dt_text = _TZ_RE.sub("", dt_text)
+
+    # 'YYYY-MM-DD[T ]HH:MM[:SS]' goes straight to the C-level ISO parser
+    if len(dt_text) in (16, 19) and dt_text[4] == "-" and dt_text[7] == "-" and dt_text[10] in "T ":
+        try:
+            return datetime.fromisoformat(dt_text)
+        except ValueError:
+            pass
 
-    # strip trailing Z or timezone offset if present (we treat times as local)
-    dt_text = dt_text.replace("Z", "")
-    if "+" in dt_text:
-        dt_text = dt_text.split("+", 1)[0]
-    if "-" in dt_text and "T" in dt_text and dt_text.count("-") > 2:
-        # e.g. 2025-11-07T08:05:00-02:00
-        dt_text = dt_text.rsplit("-", 1)[0]
+    m = _DT_RE.fullmatch(dt_text)
+    if m:
+        try:
+            return datetime(int(m[1]), int(m[2]), int(m[3]), int(m[4]), int(m[5]), int(m[6] or 0))
+        except ValueError:
+            return None
 
+    # non-canonical shapes (single-digit fields etc.)
     for fmt in (
         "%Y-%m-%dT%H:%M:%S",
         "%Y-%m-%dT%H:%M",
@@ -71,16 +131,20 @@ def _parse_dt(date_str: str, time_str: str):
     ):
         try:
             return datetime.strptime(dt_text, fmt)
-        except Exception:
+        except ValueError:
             continue
     return None
 
+# English names for "%a %d %b %H:%M" output without going through strftime/locale
+_DOW = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MON = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
 def _fmt_dt(date_str: str, time_str: str, location: str = "", terminal: str = "") -> str:
     dt = _parse_dt(date_str, time_str)
     if not dt:
         base = f"{date_str} {time_str}".strip()
         return f"{base} — {location}".strip()
-    pretty = dt.strftime("%a %d %b %H:%M")
+    pretty = f"{_DOW[dt.weekday()]} {dt.day:02d} {_MON[dt.month]} {dt.hour:02d}:{dt.minute:02d}"
     return f"{pretty} — {location} T{terminal}" if terminal else f"{pretty} — {location}"
 
 
@@ -103,15 +167,13 @@ def _build_indexes(resp: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dic
     for rl in root.get("ReferenceList", []) or []:
         t = rl.get("@type")
         if t == "ReferenceListFlight":
-            for f in rl.get("Flight", []) or []:
-                fid = f.get("id")
-                if fid:
-                    flights_by_id[fid] = f
+            flights_by_id.update({
+                f["id"]: f for f in rl.get("Flight", []) or [] if f.get("id")
+            })
         elif t == "ReferenceListTermsAndConditions":
-            for tc in rl.get("TermsAndConditions", []) or []:
-                tid = tc.get("id")
-                if tid:
-                    terms_by_id[tid] = tc
+            terms_by_id.update({
+                tc["id"]: tc for tc in rl.get("TermsAndConditions", []) or [] if tc.get("id")
+            })
 
     # B) Object-style blocks (some tenants)
     for list_name, item_name, key_name in [
@@ -125,18 +187,46 @@ def _build_indexes(resp: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dic
             if rid and rid not in flights_by_id:
                 flights_by_id[rid] = it
 
+    # Object-style terms never override array entries, and the first of a duplicate id wins
     tco_block = root.get("ReferenceListTermsAndConditions") or {}
-    for tc in tco_block.get("TermsAndConditions", []) or []:
-        tid = tc.get("id")
-        if tid and tid not in terms_by_id:
-            terms_by_id[tid] = tc
+    tco_terms = tco_block.get("TermsAndConditions", []) or []
+    if tco_terms:
+        object_terms = {tc["id"]: tc for tc in reversed(tco_terms) if tc.get("id")}
+        object_terms.update(terms_by_id)
+        terms_by_id = object_terms
 
     return flights_by_id, terms_by_id
 
 
+def _indexes(resp: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """_build_indexes memoized on the response dict itself (under "_tp_cache")."""
+    cache = resp.get("_tp_cache")
+    if cache is None:
+        cache = resp["_tp_cache"] = _build_indexes(resp)
+    return cache
+
+
 # ------------------------------
 # Baggage summary (dict, matches StateMachine formatter expectations)
 # ------------------------------
+def _first(seq: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """First element of a JSON array, or an empty dict when missing/empty"""
+    return seq[0] if seq else {}
+
+
+def _penalty_text(entry: Dict[str, Any]) -> Optional[str]:
+    """'25%' or '50 EUR' for a Change/Cancel entry's first Penalty, else None"""
+    if not entry:
+        return None
+    p = _first(entry.get("Penalty"))
+    if "Percent" in p:
+        return f"{p.get('Percent')}%"
+    if "Amount" in p:
+        a = p.get("Amount") or {}
+        return f"{v} {a.get('code')}" if (v := a.get("value")) else None
+    return None
+
+
 def _baggage_from_terms_ref(terms_ref: Optional[str], terms_idx: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
     out = {
         "checked_bag_included": False,
@@ -157,56 +247,53 @@ def _baggage_from_terms_ref(terms_ref: Optional[str], terms_idx: Dict[str, Dict[
     out["payment_time_limit"] = t.get("PaymentTimeLimit")
 
     # penalties
-    pen = (t.get("Penalties") or [{}])[0]
-    chg = (pen.get("Change") or [{}])[0]
-    can = (pen.get("Cancel") or [{}])[0]
-    if chg:
-        p = (chg.get("Penalty") or [{}])[0]
-        if "Percent" in p:
-            out["penalties_change"] = f"{p.get('Percent')}%"
-        elif "Amount" in p:
-            a = p.get("Amount") or {}
-            out["penalties_change"] = f"{a.get('value')} {a.get('code')}" if a.get('value') else None
-    if can:
-        p = (can.get("Penalty") or [{}])[0]
-        if "Percent" in p:
-            out["penalties_cancel"] = f"{p.get('Percent')}%"
-        elif "Amount" in p:
-            a = p.get("Amount") or {}
-            out["penalties_cancel"] = f"{a.get('value')} {a.get('code')}" if a.get('value') else None
+    pen = _first(t.get("Penalties"))
+    out["penalties_change"] = _penalty_text(_first(pen.get("Change")))
+    out["penalties_cancel"] = _penalty_text(_first(pen.get("Cancel")))
 
     # baggage allowance
-    for b in t.get("BaggageAllowance", []) or []:
+    for b in t.get("BaggageAllowance") or ():
         btype = b.get("baggageType")
-        items = b.get("BaggageItem") or []
+        items = b.get("BaggageItem") or ()
         if btype == "FirstCheckedBag":
-            out["checked_bag_included"] = any(i.get("includedInOfferPrice") == "Yes" for i in items)
+            # one pass: included flag + weight allowance
+            included = False
             kg = None
             for i in items:
-                for m in i.get("Measurement", []) or []:
+                get = i.get
+                if get("includedInOfferPrice") == "Yes":
+                    included = True
+                for m in get("Measurement") or ():
                     if (m.get("measurementType") == "Weight") and str(m.get("unit", "")).lower().startswith("kg"):
                         try:
                             kg = float(m.get("value"))
-                        except Exception:
+                        except (TypeError, ValueError):
                             pass
+            out["checked_bag_included"] = included
             out["checked_bag_allowance_kg"] = kg
         elif btype == "CarryOn":
-            out["carry_on_included"] = any(i.get("includedInOfferPrice") == "Yes" for i in items)
+            # one pass: included flag + piece count + first text
+            included = False
             qty = None
             text = None
             for i in items:
-                if "quantity" in i and i["quantity"] is not None:
+                get = i.get
+                if get("includedInOfferPrice") == "Yes":
+                    included = True
+                q = get("quantity")
+                if q is not None:
                     try:
-                        qty = int(i["quantity"])
-                    except Exception:
+                        qty = int(q)
+                    except (TypeError, ValueError):
                         pass
                 if "Text" in i:
                     tval = i["Text"]
                     if isinstance(tval, list) and tval:
                         tval = tval[0]
                     text = text or tval
-            if not text and isinstance(b.get("Text"), list) and b["Text"]:
-                text = b["Text"][0]
+            out["carry_on_included"] = included
+            if not text and isinstance(btext := b.get("Text"), list) and btext:
+                text = btext[0]
             out["carry_on_piece_count"] = qty
             out["carry_on_text"] = text
     return out
@@ -215,46 +302,53 @@ def _baggage_from_terms_ref(terms_ref: Optional[str], terms_idx: Dict[str, Dict[
 # ------------------------------
 # Itinerary construction from flightRefs (old impl style output)
 # ------------------------------
+# shared fallback for missing Departure/Arrival blocks; read-only by convention
+_EMPTY: Dict[str, Any] = {}
+
+def _departure_key(seg: Dict[str, Any]) -> Tuple[str, str]:
+    dep = seg.get("Departure") or _EMPTY
+    return dep.get("date", ""), dep.get("time", "")
+
 def _segments_from_refs(refs: List[str], flights_idx: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
     segs = []
     for r in refs or []:
         f = flights_idx.get(r)
         if f:
             segs.append(f)
-    segs.sort(key=lambda s: (s.get("Departure", {}).get("date", ""), s.get("Departure", {}).get("time", "")))
+    if len(segs) > 1:  # direct flights need no ordering
+        segs.sort(key=_departure_key)
     return segs
 
-# --- replace _layovers_and_stops to be more tolerant and carry airport code ---
-def _layovers_and_stops(segments: List[Dict[str, Any]]) -> Tuple[List[Dict[str, str]], int]:
-    layovers: List[Dict[str, str]] = []
-    total_minutes = 0
-
-    def _airport_from(deparr: Dict[str, Any]) -> str:
-        return (
-            deparr.get("location")
-            or deparr.get("airport")
-            or deparr.get("Airport")
-            or deparr.get("Iata")
-            or deparr.get("iata")
-            or ""
-        )
-
-    for i in range(len(segments) - 1):
-        prev = segments[i].get("Arrival", {}) or {}
-        nxt  = segments[i + 1].get("Departure", {}) or {}
-        a_dt = _parse_dt(prev.get("date", ""), prev.get("time", "") or prev.get("Time", ""))
-        d_dt = _parse_dt(nxt.get("date", ""),  nxt.get("time", "")  or nxt.get("Time", ""))
-        if a_dt and d_dt and d_dt > a_dt:
-            mins = int((d_dt - a_dt).total_seconds() // 60)
-            total_minutes += mins
-            airport = _airport_from(prev)
-            layovers.append({
-                "city": airport,             # legacy key
-                "airport_code": airport,     # explicit code
-                "duration": _human_minutes(mins),
-                "minutes": mins,
-            })
-    return layovers, total_minutes
+def _airport_code(deparr: Dict[str, Any]) -> str:
+    return (
+        deparr.get("location")
+        or deparr.get("airport")
+        or deparr.get("Airport")
+        or deparr.get("Iata")
+        or deparr.get("iata")
+        or ""
+    )
+
+
+# nested carrier objects: marketing parents first, then operating
+_NESTED_CARRIER_PARENTS = (
+    ("MarketingCarrier", "marketingCarrier", "Carrier"),
+    ("OperatingCarrier", "operatingCarrier"),
+)
+_NESTED_CODE_KEYS = ("code", "airlineCode", "carrierCode")
+_NESTED_NUM_KEYS = ("number", "flightNumber")
+
+# last-resort flat keys seen in some payloads, in priority order
+_CARRIER_CODE_KEYS = ("airlineCode", "MarketingCarrierCode", "OperatingCarrierCode")
+_CARRIER_NUM_KEYS = ("flightNumber", "MarketingFlightNumber", "OperatingFlightNumber")
+
+def _pick_code_num(obj):
+    """(code, number) from a nested carrier object, (None, None) for anything else."""
+    if not isinstance(obj, dict):
+        return None, None
+    c = next((v for k in _NESTED_CODE_KEYS if (v := obj.get(k))), None)
+    n = next((v for k in _NESTED_NUM_KEYS if (v := obj.get(k))), None)
+    return c, n
 
 
 def _pick_carrier_and_number(seg: dict) -> tuple[str | None, str | None]:
@@ -265,29 +359,21 @@ def _pick_carrier_and_number(seg: dict) -> tuple[str | None, str | None]:
     code = seg.get("carrier")
     num  = seg.get("number")
 
-    # nested shapes
-    mc = seg.get("MarketingCarrier") or seg.get("marketingCarrier") or seg.get("Carrier") or {}
-    oc = seg.get("OperatingCarrier") or seg.get("operatingCarrier") or {}
-
-    def pick(obj):
-        if not isinstance(obj, dict):
-            return None, None
-        c = obj.get("code") or obj.get("airlineCode") or obj.get("carrierCode")
-        n = obj.get("number") or obj.get("flightNumber")
-        return c, n
-
-    if not code:
-        c1, n1 = pick(mc)
-        code = code or c1
-        num  = num  or n1
+    # nested shapes, only probed while no code was found; the first present
+    # parent of each kind is the one used
     if not code:
-        c2, n2 = pick(oc)
-        code = code or c2
-        num  = num  or n2
+        for parents in _NESTED_CARRIER_PARENTS:
+            obj = next((v for k in parents if (v := seg.get(k))), None)
+            code, n = _pick_code_num(obj)
+            num = num or n
+            if code:
+                break
 
-    # last resorts seen in some payloads
-    code = code or seg.get("airlineCode") or seg.get("MarketingCarrierCode") or seg.get("OperatingCarrierCode")
-    num  = num  or seg.get("flightNumber") or seg.get("MarketingFlightNumber") or seg.get("OperatingFlightNumber")
+    # last resorts seen in some payloads (only probed while still missing)
+    if not code:
+        code = next((v for k in _CARRIER_CODE_KEYS if (v := seg.get(k))), None)
+    if not num:
+        num = next((v for k in _CARRIER_NUM_KEYS if (v := seg.get(k))), None)
 
     return (str(code) if code else None, str(num) if num else None)
 
@@ -309,33 +395,47 @@ def _itinerary_from_segments(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
     if not segments:
         return out
 
-    d0 = segments[0].get("Departure", {}) or {}
-    aN = segments[-1].get("Arrival", {}) or {}
+    d0 = segments[0].get("Departure") or _EMPTY
+    aN = segments[-1].get("Arrival") or _EMPTY
 
     out["departure_time_text"] = _fmt_dt(d0.get("date", ""), d0.get("time", ""), d0.get("location", ""), d0.get("terminal", "") or "")
     out["arrival_time_text"]   = _fmt_dt(aN.get("date", ""), aN.get("time", ""), aN.get("location", ""))
 
-    names: list[str] = []
-    numbers: list[str] = []
-    seen_codes: set[str] = set()
+    picked: List[Tuple[Optional[str], Optional[str]]] = []  # (code, number) per segment
+    seg_sum = 0
+    layovers: List[Dict[str, Any]] = []
+    lay_min = 0
+    prev_arr = None
 
+    # one pass: layovers (tolerant, carrying the airport code), carriers,
+    # flight numbers and summed segment durations
     for s in segments:
-        code, num = _pick_carrier_and_number(s)
-        if code:
-            out["carrier_codes"].append(code)
-            if code not in seen_codes:
-                seen_codes.add(code)
-                try:
-                    names.append(get_airline_name(code))
-                except Exception:
-                    names.append(code)
-        if code and num:
-            numbers.append(f"{code}{num}")
+        if prev_arr is not None:
+            dep = s.get("Departure") or _EMPTY
+            a_dt = _parse_dt(prev_arr.get("date", ""), prev_arr.get("time", "") or prev_arr.get("Time", ""))
+            d_dt = _parse_dt(dep.get("date", ""), dep.get("time", "") or dep.get("Time", ""))
+            if a_dt and d_dt and d_dt > a_dt:
+                mins = int((d_dt - a_dt).total_seconds() // 60)
+                lay_min += mins
+                airport = _airport_code(prev_arr)
+                layovers.append({
+                    "city": airport,             # legacy key
+                    "airport_code": airport,     # explicit code
+                    "duration": _human_minutes(mins),
+                    "minutes": mins,
+                })
+        prev_arr = s.get("Arrival") or _EMPTY
+
+        seg_sum += _parse_iso_duration_minutes(s.get("duration") or "")
+        picked.append(_pick_carrier_and_number(s))
+
+    codes = out["carrier_codes"] = [code for code, _ in picked if code]
+    # dict.fromkeys dedupes while keeping first-seen order
+    names = [_airline_name_cached(code) for code in dict.fromkeys(codes)]
+    numbers = [f"{code}{num}" for code, num in picked if code and num]
 
     out["airlines"] = ", ".join(names) if names else None
     out["flight_numbers"] = ", ".join(numbers) if numbers else None
-    seg_sum = sum(_parse_iso_duration_minutes(s.get("duration") or "") for s in segments)
-    layovers, lay_min = _layovers_and_stops(segments)
     out["layovers"] = layovers
     out["stops"] = max(0, len(segments) - 1)
 
@@ -343,9 +443,7 @@ def _itinerary_from_segments(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
     if seg_sum:  # preferred path (avoids TZ errors)
         total_minutes = seg_sum + lay_min
     else:
-        # fallback to wall-clock if segment durations missing
-        d0 = segments[0].get("Departure", {}) or {}
-        aN = segments[-1].get("Arrival", {}) or {}
+        # fallback to wall-clock if segment durations missing (d0/aN bound above)
         d_dt = _parse_dt(d0.get("date", ""), d0.get("time", "") or d0.get("Time", ""))
         a_dt = _parse_dt(aN.get("date", ""), aN.get("time", "") or aN.get("Time", ""))
         if d_dt and a_dt and a_dt >= d_dt:
@@ -370,100 +468,86 @@ def _itinerary_from_segments(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
 # ------------------------------
 # Cheapest selection (old-file behavior)
 # ------------------------------
-def _offering_min_price(off: Dict[str, Any]) -> Optional[float]:
-    """Min BestCombinablePrice.TotalPrice found inside an offering."""
-    best = None
-    for pbo in off.get("ProductBrandOptions", []) or []:
-        for p in pbo.get("ProductBrandOffering", []) or []:
-            price = (p.get("BestCombinablePrice") or {}).get("TotalPrice")
-            if price is None:
-                continue
-            try:
-                val = float(price)
-            except Exception:
-                continue
-            if best is None or val < best:
-                best = val
-    return best
-
-def _select_cheapest_brand_offering(off: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Return the cheapest ProductBrandOffering dict from an offering."""
-    cheapest = None
-    cheapest_val = float("inf")
+_NUMERIC_START = frozenset("+-.0123456789")
+
+def _to_float(v: Any, default: Optional[float] = None) -> Optional[float]:
+    """Coerce a price-like value to float without raising; `default` for missing/non-numeric."""
+    if v is None:
+        return default
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        s = v.strip()
+        if not s or s[0] not in _NUMERIC_START:
+            return default
+        try:
+            return float(s)
+        except ValueError:
+            return default
+    return default
+
+def _iter_priced_brand_offerings(off: Dict[str, Any]):
+    """Yield (total_price, brand_offering, pbo_flight_refs) for every priced ProductBrandOffering."""
     for pbo in off.get("ProductBrandOptions", []) or []:
         # If flightRefs are at the PBO level, keep for later
         pbo_refs = pbo.get("flightRefs") or []
         for brand_off in pbo.get("ProductBrandOffering", []) or []:
-            price_info = brand_off.get("BestCombinablePrice", {}) or {}
-            total = price_info.get("TotalPrice")
-            if total is None:
-                continue
-            try:
-                total_val = float(total)
-            except Exception:
-                continue
-            if total_val < cheapest_val:
-                cheapest = dict(brand_off)  # shallow copy so we can stitch refs
-                if pbo_refs and not cheapest.get("flightRefs"):
-                    cheapest["flightRefs"] = list(pbo_refs)
-                cheapest_val = total_val
-    return cheapest
-
-
-# ------------------------------
-# Public: extract cheapest one-way (enriched)
-# ------------------------------
-def extract_cheapest_one_way_summary(resp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    root = resp.get("CatalogProductOfferingsResponse", {}) or {}
-    offerings = (root.get("CatalogProductOfferings") or {}).get("CatalogProductOffering") or []
-    if not offerings:
-        return None
+            total = _to_float((brand_off.get("BestCombinablePrice", {}) or {}).get("TotalPrice"))
+            if total is not None:
+                yield total, brand_off, pbo_refs
 
-    # Choose globally cheapest offering option
-    cheapest_off = None
-    cheapest_val = float("inf")
-    cheapest_choice = None
-    for off in offerings:
-        ch = _select_cheapest_brand_offering(off)
-        if not ch:
-            continue
-        total = (ch.get("BestCombinablePrice") or {}).get("TotalPrice")
-        try:
-            val = float(total)
-        except Exception:
-            continue
-        if val < cheapest_val:
-            cheapest_val = val
-            cheapest_off = off
-            cheapest_choice = ch
+def _stitch_refs(brand_off: Dict[str, Any], pbo_refs: List[str]) -> Dict[str, Any]:
+    """Shallow copy of a brand offering carrying the PBO-level flightRefs if it has none."""
+    chosen = dict(brand_off)
+    if pbo_refs and not chosen.get("flightRefs"):
+        chosen["flightRefs"] = list(pbo_refs)
+    return chosen
 
-    if not cheapest_choice:
-        return None
+def _cheapest_priced(off: Dict[str, Any]):
+    """(total_price, brand_offering, pbo_flight_refs) of an offering's cheapest fare, or None."""
+    return min(_iter_priced_brand_offerings(off), key=itemgetter(0), default=None)
 
-    flights_idx, terms_idx = _build_indexes(resp)
 
+# ------------------------------
+# Leg assembly (shared by the one-way and round-trip extractors)
+# ------------------------------
+def _build_leg(
+    choice: Dict[str, Any],
+    flights_idx: Dict[str, Dict[str, Any]],
+    terms_idx: Dict[str, Dict[str, Any]],
+    bag_cache: Optional[Dict[Optional[str], Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Price block + itinerary + baggage for one chosen brand offering.
+
+    `bag_cache` (terms ref -> parsed baggage) lets several legs of one response
+    share the baggage parse; each leg still gets its own copy.
+    """
     # price block
-    bp = cheapest_choice.get("BestCombinablePrice") or {}
+    bp = choice.get("BestCombinablePrice") or {}
     price = {
         "currency": ((bp.get("CurrencyCode") or {}).get("value")) if isinstance(bp.get("CurrencyCode"), dict) else bp.get("CurrencyCode"),
-        "total": float(bp.get("TotalPrice")) if bp.get("TotalPrice") is not None else None,
-        "base": float(bp.get("Base")) if bp.get("Base") is not None else None,
-        "taxes": float(bp.get("TotalTaxes")) if bp.get("TotalTaxes") is not None else None,
+        "total": _to_float(bp.get("TotalPrice")),
+        "base": _to_float(bp.get("Base")),
+        "taxes": _to_float(bp.get("TotalTaxes")),
     }
 
     # refs + terms
-    refs = cheapest_choice.get("flightRefs") or []
-    terms_ref = (cheapest_choice.get("TermsAndConditions") or {}).get("termsAndConditionsRef")
+    refs = choice.get("flightRefs") or []
+    terms_ref = (choice.get("TermsAndConditions") or {}).get("termsAndConditionsRef")
 
     segs = _segments_from_refs(refs, flights_idx)
     itin = _itinerary_from_segments(segs)
-    baggage = _baggage_from_terms_ref(terms_ref, terms_idx)
+    if bag_cache is None:
+        baggage = _baggage_from_terms_ref(terms_ref, terms_idx)
+    else:
+        cached = bag_cache.get(terms_ref)
+        if cached is None:
+            cached = bag_cache[terms_ref] = _baggage_from_terms_ref(terms_ref, terms_idx)
+        baggage = dict(cached)  # validating_airline may be patched below
     if not baggage.get("validating_airline") and itin.get("carrier_codes"):
         baggage["validating_airline"] = itin["carrier_codes"][0]
 
-    # ONE-WAY summary shape expected by FlightSearchStateMachine (flat)
     return {
-        "direction": "outbound",
         "price": price,
         "duration_minutes_total": itin["duration_minutes"],
         "stops_total": itin["stops"],
@@ -473,6 +557,33 @@ def extract_cheapest_one_way_summary(resp: Dict[str, Any]) -> Optional[Dict[str,
     }
 
 
+# ------------------------------
+# Public: extract cheapest one-way (enriched)
+# ------------------------------
+def extract_cheapest_one_way_summary(resp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    root = resp.get("CatalogProductOfferingsResponse", {}) or {}
+    offerings = (root.get("CatalogProductOfferings") or {}).get("CatalogProductOffering") or []
+    if not offerings:
+        return None
+
+    # Choose globally cheapest offering option: scan prices only, and copy /
+    # stitch refs for the single winner
+    best = min(
+        chain.from_iterable(_iter_priced_brand_offerings(off) for off in offerings),
+        key=itemgetter(0),
+        default=None,
+    )
+
+    if best is None:
+        return None
+    cheapest_choice = _stitch_refs(best[1], best[2])
+
+    flights_idx, terms_idx = _indexes(resp)
+
+    # ONE-WAY summary shape expected by FlightSearchStateMachine (flat)
+    return {"direction": "outbound", **_build_leg(cheapest_choice, flights_idx, terms_idx)}
+
+
 # ------------------------------
 # Public: extract cheapest round-trip (paired cheapest outbound + return)
 # ------------------------------
@@ -482,58 +593,55 @@ def extract_cheapest_round_trip_summary(resp: Dict[str, Any]) -> Optional[Dict[s
     if not offerings:
         return None
 
-    # Many payloads mark direction with "sequence": 1 (outbound), 2 (inbound)
-    seq_buckets: Dict[int, List[Dict[str, Any]]] = {}
+    # Many payloads mark direction with "sequence": 1 (outbound), 2 (inbound).
+    # One pass finds each offering's cheapest fare once, keeps the cheapest
+    # offering per direction together with that fare, and records every
+    # offering's price for the fallback below (unpriced offerings rank last
+    # but still count; ties keep the first seen).
+    inf = float("inf")
+    priced: List[Tuple[float, Dict[str, Any], Any]] = []
+    cheapest_by_seq: Dict[int, Tuple[float, Dict[str, Any], Any]] = {}
     for off in offerings:
-        try:
-            seq = int(off.get("sequence", 0))
-        except Exception:
-            seq = 0
-        seq_buckets.setdefault(seq, []).append(off)
+        best = _cheapest_priced(off)
+        entry = ((best[0] if best is not None else None) or inf, off, best)
+        priced.append(entry)
+        seq = off.get("sequence", 0)
+        if type(seq) is not int:  # most payloads already send ints
+            try:
+                seq = int(seq)
+            except (TypeError, ValueError):
+                seq = 0
+        if seq != 1 and seq != 2:
+            continue
+        cur = cheapest_by_seq.get(seq)
+        if cur is None or entry[0] < cur[0]:
+            cheapest_by_seq[seq] = entry
 
-    out_off = min(seq_buckets.get(1, []), key=lambda o: _offering_min_price(o) or float("inf")) if seq_buckets.get(1) else None
-    in_off  = min(seq_buckets.get(2, []), key=lambda o: _offering_min_price(o) or float("inf")) if seq_buckets.get(2) else None
+    _, out_off, out_best = cheapest_by_seq.get(1, (None, None, None))
+    _, in_off, in_best = cheapest_by_seq.get(2, (None, None, None))
 
     # Fall back: if no clear sequence split, pick two cheapest distinct offerings
-    if not out_off and offerings:
-        offerings_sorted = sorted(offerings, key=lambda o: _offering_min_price(o) or float("inf"))
-        out_off = offerings_sorted[0] if offerings_sorted else None
-        in_off = offerings_sorted[1] if len(offerings_sorted) > 1 else None
+    # (stable sort on the prices computed above)
+    if not out_off and priced:
+        ranked = sorted(priced, key=itemgetter(0))
+        _, out_off, out_best = ranked[0]
+        _, in_off, in_best = ranked[1] if len(ranked) > 1 else (None, None, None)
 
     if not out_off:
         return None
 
-    out_choice = _select_cheapest_brand_offering(out_off)
-    in_choice  = _select_cheapest_brand_offering(in_off) if in_off else None
+    if out_best is None:
+        return None  # no priced outbound fare: nothing to enrich, skip indexing
+    # copy / stitch refs for the winning fares only
+    out_choice = _stitch_refs(out_best[1], out_best[2])
+    in_choice  = _stitch_refs(in_best[1], in_best[2]) if in_off and in_best is not None else None
 
-    flights_idx, terms_idx = _build_indexes(resp)
+    flights_idx, terms_idx = _indexes(resp)
+    # Legs of one fare family usually share their terms; parse each terms ref once per call
+    bag_cache: Dict[Optional[str], Dict[str, Any]] = {}
 
-    def make_leg(choice: Dict[str, Any]) -> Dict[str, Any]:
-        bp = choice.get("BestCombinablePrice") or {}
-        price = {
-            "currency": ((bp.get("CurrencyCode") or {}).get("value")) if isinstance(bp.get("CurrencyCode"), dict) else bp.get("CurrencyCode"),
-            "total": float(bp.get("TotalPrice")) if bp.get("TotalPrice") is not None else None,
-            "base": float(bp.get("Base")) if bp.get("Base") is not None else None,
-            "taxes": float(bp.get("TotalTaxes")) if bp.get("TotalTaxes") is not None else None,
-        }
-        refs = choice.get("flightRefs") or []
-        terms_ref = (choice.get("TermsAndConditions") or {}).get("termsAndConditionsRef")
-        segs = _segments_from_refs(refs, flights_idx)
-        itin = _itinerary_from_segments(segs)
-        bag = _baggage_from_terms_ref(terms_ref, terms_idx)
-        if not bag.get("validating_airline") and itin.get("carrier_codes"):
-            bag["validating_airline"] = itin["carrier_codes"][0]
-        return {
-            "price": price,
-            "duration_minutes_total": itin["duration_minutes"],
-            "stops_total": itin["stops"],
-            "baggage": bag,
-            "flightRefs": refs,
-            "itinerary": itin,
-        }
-
-    outbound = make_leg(out_choice) if out_choice else None
-    inbound = make_leg(in_choice) if in_choice else None
+    outbound = _build_leg(out_choice, flights_idx, terms_idx, bag_cache)
+    inbound = _build_leg(in_choice, flights_idx, terms_idx, bag_cache) if in_choice else None
 
     # Summary totals
     total_price = 0.0
@@ -565,10 +673,54 @@ def extract_cheapest_round_trip_summary(resp: Dict[str, Any]) -> Optional[Dict[s
 # ------------------------------
 
 import asyncio
-from datetime import datetime, timedelta
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 import calendar
 
+# Parallel Travelport calls per sync bulk search; tune for upstream rate limits
+BULK_SEARCH_CONCURRENCY = max(1, int(os.getenv("BULK_SEARCH_CONCURRENCY", "8")))
+
+# Single date mentions - not a bulk search
+_SINGLE_DATE_RE = re.compile(r'on \d{4}-\d{2}-\d{2}|for \d{4}-\d{2}-\d{2}|tomorrow|today')
+
+# Bulk period phrases -> (priority, period_type, month_num); when several appear,
+# the lowest priority (table order) wins
+_BULK_PERIODS = {
+    name: (rank, period_type, month_num)
+    for rank, (name, period_type, month_num) in enumerate([
+        ('november', 'month', 11),
+        ('december', 'month', 12),
+        ('january', 'month', 1),
+        ('february', 'month', 2),
+        ('march', 'month', 3),
+        ('april', 'month', 4),
+        ('may', 'month', 5),
+        ('june', 'month', 6),
+        ('july', 'month', 7),
+        ('august', 'month', 8),
+        ('september', 'month', 9),
+        ('october', 'month', 10),
+        ('next week', 'next_week', None),
+        ('this week', 'this_week', None),
+        ('next month', 'next_month', None),
+        ('this month', 'this_month', None),
+    ])
+}
+_BULK_PERIOD_RE = re.compile(r'\b(' + '|'.join(_BULK_PERIODS) + r')\b')
+
+_BETWEEN_RE = re.compile(r'between\s+(\d{4}-\d{2}-\d{2})\s+and\s+(\d{4}-\d{2}-\d{2})')
+
+_DAYS_2DIGIT = tuple(f"{d:02d}" for d in range(1, 32))
+
+def _days_in(year: int, month: int, first_day: int = 1) -> List[str]:
+    """'YYYY-MM-DD' strings from first_day to the end of the month."""
+    prefix = f"{year:04d}-{month:02d}-"
+    return [prefix + dd for dd in _DAYS_2DIGIT[first_day - 1:calendar.monthrange(year, month)[1]]]
+
 def parse_date_range(user_input: str, departure_date: Optional[str] = None) -> Tuple[List[str], bool]:
     """
     Parse user input to detect bulk search patterns and return list of dates.
@@ -584,109 +736,62 @@ def parse_date_range(user_input: str, departure_date: Optional[str] = None) -> T
     today = datetime.now().date()
     
     # Single date patterns - not bulk search
-    single_date_patterns = [
-        r'on \d{4}-\d{2}-\d{2}',
-        r'for \d{4}-\d{2}-\d{2}',
-        r'tomorrow',
-        r'today'
-    ]
-    
-    import re
-    for pattern in single_date_patterns:
-        if re.search(pattern, user_input_lower):
-            if departure_date:
-                return [departure_date], False
-            return [], False
-    
-    # Bulk search patterns
-    bulk_patterns = {
-        'november': ('month', 11),
-        'december': ('month', 12),
-        'january': ('month', 1),
-        'february': ('month', 2),
-        'march': ('month', 3),
-        'april': ('month', 4),
-        'may': ('month', 5),
-        'june': ('month', 6),
-        'july': ('month', 7),
-        'august': ('month', 8),
-        'september': ('month', 9),
-        'october': ('month', 10),
-        'next week': ('next_week', None),
-        'this week': ('this_week', None),
-        'next month': ('next_month', None),
-        'this month': ('this_month', None),
-    }
+    if _SINGLE_DATE_RE.search(user_input_lower):
+        if departure_date:
+            return [departure_date], False
+        return [], False
     
     dates = []
     is_bulk = False
     
-    # Check for month patterns
-    for pattern, (period_type, month_num) in bulk_patterns.items():
-        if pattern in user_input_lower:
-            is_bulk = True
-            if period_type == 'month' and month_num:
-                # Generate all days in the specified month
-                year = today.year
-                if month_num < today.month:
-                    year += 1  # Next year if month already passed
+    # Check for month / period patterns: one scan, earliest table entry wins
+    hits = [_BULK_PERIODS[m.group(1)] for m in _BULK_PERIOD_RE.finditer(user_input_lower)]
+    if hits:
+        _, period_type, month_num = min(hits)
+        is_bulk = True
+        if period_type == 'month' and month_num:
+            # Generate all days in the specified month
+            year = today.year
+            if month_num < today.month:
+                year += 1  # Next year if month already passed
+            dates.extend(_days_in(year, month_num))
                 
-                # Get number of days in month
-                days_in_month = calendar.monthrange(year, month_num)[1]
+        elif period_type == 'next_week':
+            # Next 7 days starting from tomorrow
+            start_date = today + timedelta(days=1)
+            dates.extend((start_date + timedelta(days=i)).isoformat() for i in range(7))
                 
-                for day in range(1, days_in_month + 1):
-                    date_str = f"{year:04d}-{month_num:02d}-{day:02d}"
-                    dates.append(date_str)
-                    
-            elif period_type == 'next_week':
-                # Next 7 days starting from tomorrow
-                start_date = today + timedelta(days=1)
-                for i in range(7):
-                    date_str = (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-                    dates.append(date_str)
-                    
-            elif period_type == 'this_week':
-                # Remaining days of current week
-                days_until_sunday = (6 - today.weekday()) % 7
-                for i in range(days_until_sunday + 1):
-                    date_str = (today + timedelta(days=i)).strftime('%Y-%m-%d')
-                    dates.append(date_str)
-                    
-            elif period_type == 'next_month':
-                # All days in next month
-                if today.month == 12:
-                    next_month = 1
-                    next_year = today.year + 1
-                else:
-                    next_month = today.month + 1
-                    next_year = today.year
+        elif period_type == 'this_week':
+            # Remaining days of current week
+            days_until_sunday = (6 - today.weekday()) % 7
+            dates.extend((today + timedelta(days=i)).isoformat() for i in range(days_until_sunday + 1))
                 
-                days_in_month = calendar.monthrange(next_year, next_month)[1]
-                for day in range(1, days_in_month + 1):
-                    date_str = f"{next_year:04d}-{next_month:02d}-{day:02d}"
-                    dates.append(date_str)
-                    
-            elif period_type == 'this_month':
-                # Remaining days in current month
-                days_in_month = calendar.monthrange(today.year, today.month)[1]
-                for day in range(today.day, days_in_month + 1):
-                    date_str = f"{today.year:04d}-{today.month:02d}-{day:02d}"
-                    dates.append(date_str)
-            break
+        elif period_type == 'next_month':
+            # All days in next month
+            if today.month == 12:
+                next_month = 1
+                next_year = today.year + 1
+            else:
+                next_month = today.month + 1
+                next_year = today.year
+            dates.extend(_days_in(next_year, next_month))
+                
+        elif period_type == 'this_month':
+            # Remaining days in current month
+            dates.extend(_days_in(today.year, today.month, first_day=today.day))
     
     # Check for "between X and Y" pattern
-    between_pattern = r'between\s+(\d{4}-\d{2}-\d{2})\s+and\s+(\d{4}-\d{2}-\d{2})'
-    match = re.search(between_pattern, user_input_lower)
+    match = _BETWEEN_RE.search(user_input_lower)
     if match:
         is_bulk = True
         start_date_str, end_date_str = match.groups()
         try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+            start_date = date.fromisoformat(start_date_str)
+            end_date = date.fromisoformat(end_date_str)
             
             current_date = start_date
             while current_date <= end_date:
-                dates.append(current_date.strftime('%Y-%m-%d'))
+                dates.append(current_date.isoformat())
                 current_date += timedelta(days=1)
         except ValueError:
             pass  # Invalid date format
@@ -694,15 +799,57 @@ def parse_date_range(user_input: str, departure_date: Optional[str] = None) -> T
     return dates, is_bulk
 
 
+def _upcoming_unique_dates(dates: List[str]) -> List[str]:
+    """Drop duplicate and past ISO dates (keeping input order) so none costs a Travelport call"""
+    today = date.today().isoformat()
+    upcoming = [d for d in dict.fromkeys(dates) if d >= today]
+    if len(upcoming) != len(dates):
+        logger.info("[BulkSearch] Skipping %d duplicate or past dates", len(dates) - len(upcoming))
+    return upcoming
+
+@lru_cache(maxsize=256)
+def _payload_template(payload_func, origin: str, destination: str, number_of_passengers: int,
+                      carriers: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    # Shared across dates and threads: never mutate, copy via _dated_payload
+    return payload_func(
+        origin=origin,
+        destination=destination,
+        departure_date="",
+        number_of_passengers=number_of_passengers,
+        carriers=None if carriers is None else list(carriers)
+    )
+
+def _dated_payload(payload_func, origin: str, destination: str, departure_date: str,
+                   number_of_passengers: int, carriers: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Same payload as payload_func(...), but built once per route/pax/carriers:
+    only the path down to the first SearchCriteriaFlight is copied to set the date.
+    """
+    template = _payload_template(payload_func, origin, destination, number_of_passengers,
+                                 None if carriers is None else tuple(carriers))
+    request = template["CatalogProductOfferingsRequest"]
+    first, *rest = request["SearchCriteriaFlight"]
+    return {
+        **template,
+        "CatalogProductOfferingsRequest": {
+            **request,
+            "SearchCriteriaFlight": [{**first, "departureDate": departure_date}, *rest],
+        },
+    }
+
+
 async def search_single_date_async(payload_func, origin: str, destination: str, date: str, 
-                                 number_of_passengers: int, carriers: List[str], trip_type: str = "one-way") -> Dict[str, Any]:
+                                 number_of_passengers: int, carriers: List[str], trip_type: str = "one-way",
+                                 client=None, token: Optional[str] = None) -> Dict[str, Any]:
     """
     Perform a single date search asynchronously.
+    With a shared httpx client and token the request is non-blocking; otherwise
+    the synchronous TravelportSearch tool runs in a worker thread.
     Returns the search result with the date included for tracking.
     """
     try:
         # Import here to avoid circular imports
-        from .TravelportSearch import TravelportSearch
+        from .TravelportSearch import TravelportSearch, TravelportSearchAsync
         
         # Create payload for this specific date
         payload = payload_func(
@@ -713,8 +860,12 @@ async def search_single_date_async(payload_func, origin: str, destination: str,
             carriers=carriers
         )
         
-        # Perform the search (this is blocking, but we're calling it in an executor)
-        result = TravelportSearch.invoke({"payload": payload, "trip_type": trip_type})
+        if client is not None and token:
+            result = await TravelportSearchAsync(payload, trip_type, client, token)
+        else:
+            # No shared client: run the blocking tool on a worker thread so the
+            # event loop (and any sibling searches) keep going
+            result = await asyncio.to_thread(TravelportSearch.invoke, {"payload": payload, "trip_type": trip_type})
         
         # Add date information to result
         result["search_date"] = date
@@ -731,10 +882,18 @@ async def search_single_date_async(payload_func, origin: str, destination: str,
 
 async def bulk_search_cheapest_async(origin: str, destination: str, dates: List[str], 
                                    number_of_passengers: int, carriers: List[str], 
-                                   trip_type: str = "one-way") -> Dict[str, Any]:
+                                   trip_type: str = "one-way",
+                                   max_concurrency: int = 8,
+                                   price_threshold: Optional[float] = None,
+                                   progress: Optional[asyncio.Queue] = None) -> Dict[str, Any]:
     """
     Perform bulk search across multiple dates to find the cheapest option.
-    Returns the cheapest result with details about all searches performed.
+    At most `max_concurrency` requests are in flight and results are reduced
+    as they complete. Each new best result is put on `progress` (if given) so
+    callers can stream early answers, and once the best price drops below
+    `price_threshold` the searches still pending are cancelled.
+    Returns the cheapest full result; `all_results` holds one compact
+    {"date", "price", "currency"} record per successful search.
     """
     if not dates:
         return {
@@ -744,79 +903,179 @@ async def bulk_search_cheapest_async(origin: str, destination: str, dates: List[
             "all_results": []
         }
     
-    # Import payload functions
-    if trip_type == "one-way":
-        from ..payloads.OneWayFlightSearch import OneWayFlightSearch
-        payload_func = OneWayFlightSearch
-    else:
-        from ..payloads.RoundTripFlightSearch import RoundTripFlightSearch
-        payload_func = RoundTripFlightSearch
-    
-    # Create tasks for all date searches
-    tasks = []
-    for date in dates:
-        task = asyncio.create_task(
-            search_single_date_async(payload_func, origin, destination, date, 
-                                   number_of_passengers, carriers, trip_type)
-        )
-        tasks.append(task)
-    
-    # Wait for all searches to complete
-    try:
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-    except Exception as e:
+    dates = _upcoming_unique_dates(dates)
+    if not dates:
         return {
             "ok": False,
-            "error": f"Bulk search failed: {str(e)}",
+            "error": "All requested dates are in the past",
             "cheapest_result": None,
             "all_results": []
         }
     
-    # Process results
-    valid_results = []
+    # Payload skeleton is built once; each date only copies the dated branch
+    payload_func = partial(_dated_payload, OneWayFlightSearch if trip_type == "one-way" else RoundTripFlightSearch)
+    
+    from .TravelportSearch import create_async_client, fetch_password_token
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    valid_by_idx: Dict[int, Dict[str, Any]] = {}
     cheapest_result = None
     cheapest_price = float('inf')
+    cheapest_idx = len(dates)
+    searched = 0
+    stopped_early = False
     
-    for result in results:
-        if isinstance(result, Exception):
-            continue
+    # One token and one pooled HTTP/2 client are shared so the date
+    # searches overlap on the network
+    try:
+        token = await asyncio.to_thread(fetch_password_token)
+        async with create_async_client() as client:
             
-        if result.get("ok") and result.get("summary"):
-            valid_results.append(result)
+            async def search_date(idx: int, date: str) -> Tuple[int, Dict[str, Any]]:
+                async with semaphore:
+                    return idx, await search_single_date_async(payload_func, origin, destination, date,
+                                                               number_of_passengers, carriers, trip_type,
+                                                               client=client, token=token)
             
-            # Extract price based on trip type
-            summary = result["summary"]
-            if trip_type == "round-trip" and summary.get("price_total"):
-                price = summary["price_total"].get("total")
-            elif trip_type == "one-way" and summary.get("price"):
-                price = summary["price"].get("total")
-            else:
-                continue
-                
-            if price and float(price) < cheapest_price:
-                cheapest_price = float(price)
-                cheapest_result = result
+            tasks = [asyncio.ensure_future(search_date(i, d)) for i, d in enumerate(dates)]
+            try:
+                # Streaming min-reduce: ties go to the earlier date, whatever finishes first
+                for next_done in asyncio.as_completed(tasks):
+                    searched += 1
+                    try:
+                        idx, result = await next_done
+                    except Exception:
+                        continue
+                    if not (result.get("ok") and result.get("summary")):
+                        continue
+                    
+                    # Extract price based on trip type
+                    summary = result["summary"]
+                    price_block = summary.get("price_total") if trip_type == "round-trip" else summary.get("price")
+                    price = price_block.get("total") if price_block else None
+                    # Keep only a compact record; the full response is dropped
+                    # unless it becomes the cheapest
+                    valid_by_idx[idx] = {
+                        "date": result.get("search_date"),
+                        "price": price,
+                        "currency": price_block.get("currency") if price_block else None,
+                    }
+                    if not price_block:
+                        continue
+                    
+                    # parse once; an unusable price just doesn't compete
+                    price_f = _to_float(price) if price else None
+                    if price_f is not None and (price_f, idx) < (cheapest_price, cheapest_idx):
+                        cheapest_price = price_f
+                        cheapest_idx = idx
+                        cheapest_result = result
+                        if progress is not None:
+                            progress.put_nowait(result)
+                    
+                    # Good enough: don't spend calls on the dates still pending
+                    if price_threshold is not None and cheapest_price < price_threshold:
+                        stopped_early = searched < len(dates)
+                        break
+            finally:
+                for t in tasks:
+                    t.cancel()
+                # let cancelled searches unwind before the shared client closes
+                await asyncio.gather(*tasks, return_exceptions=True)
+    except Exception as e:
+        return {
+            "ok": False,
+            "error": f"Bulk search failed: {str(e)}",
+            "cheapest_result": None,
+            "all_results": []
+        }
     
+    # completion order -> input date order for callers listing the options
+    valid_results = [valid_by_idx[i] for i in sorted(valid_by_idx)]
     return {
         "ok": len(valid_results) > 0,
         "cheapest_result": cheapest_result,
         "cheapest_price": cheapest_price if cheapest_price != float('inf') else None,
-        "total_searches": len(dates),
+        "total_searches": searched,
         "successful_searches": len(valid_results),
+        "stopped_early": stopped_early,
         "all_results": valid_results,
-        "search_summary": f"Searched {len(dates)} dates, found {len(valid_results)} valid options"
+        "search_summary": f"Searched {searched} dates, found {len(valid_results)} valid options"
     }
 
 
+# Short-lived cache of successful Travelport searches, so overlapping bulk
+# queries within a few minutes don't pay for the same date twice
+_SEARCH_CACHE_TTL = 300.0
+_SEARCH_CACHE_MAXSIZE = 256
+# Only these fields are kept (and returned); the raw catalog JSON can run to
+# hundreds of KB per date and nothing in the bulk path reads it
+_SEARCH_CACHE_FIELDS = ("ok", "summary", "error")
+_search_cache: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}  # key -> (expires_at, result)
+_search_cache_lock = threading.Lock()
+
+
+def cached_search(origin: str, destination: str, date: str, number_of_passengers: int,
+                  carriers: List[str], trip_type: str = "one-way") -> Dict[str, Any]:
+    """
+    TravelportSearch.invoke for one date, served from a TTL cache when the same
+    search succeeded recently. Carriers (sorted) and trip type are part of the
+    key so different variants of a route never share an entry. Returns a
+    shallow copy with ok/summary/error only, so callers may annotate it freely.
+    """
+    key = (origin, destination, date, number_of_passengers, tuple(sorted(carriers or ())), trip_type)
+    now = time.monotonic()
+    with _search_cache_lock:
+        hit = _search_cache.get(key)
+        if hit is not None:
+            if hit[0] > now:
+                return dict(hit[1])
+            del _search_cache[key]
+    
+    from .TravelportSearch import TravelportSearch  # lazy: it imports this module
+    payload_func = OneWayFlightSearch if trip_type == "one-way" else RoundTripFlightSearch
+    payload = _dated_payload(payload_func, origin, destination, date, number_of_passengers, carriers)
+    full = TravelportSearch.invoke({"payload": payload, "trip_type": trip_type})
+    result = {k: full[k] for k in _SEARCH_CACHE_FIELDS if k in full}
+    
+    # only successful searches are cached; failures are retried next time
+    if result.get("ok"):
+        with _search_cache_lock:
+            if len(_search_cache) >= _SEARCH_CACHE_MAXSIZE:
+                for k in [k for k, (exp, _) in _search_cache.items() if exp <= now]:
+                    del _search_cache[k]
+                if len(_search_cache) >= _SEARCH_CACHE_MAXSIZE:
+                    # dicts keep insertion order: drop the oldest entry
+                    del _search_cache[next(iter(_search_cache))]
+            _search_cache[key] = (now + _SEARCH_CACHE_TTL, result)
+    return dict(result)
+
+
 def bulk_search_cheapest_sync(origin: str, destination: str, dates: List[str], 
                              number_of_passengers: int, carriers: List[str], 
-                             trip_type: str = "one-way") -> Dict[str, Any]:
+                             trip_type: str = "one-way",
+                             price_floor: Optional[float] = None,
+                             patience: Optional[int] = 10,
+                             keep_all: bool = False,
+                             return_duration: Optional[int] = None) -> Dict[str, Any]:
     """
     Perform bulk search across multiple dates to find the cheapest option (synchronous version).
     Returns the cheapest result with details about all searches performed.
     
-    This version processes searches sequentially to avoid async complications in the LangChain tool context.
-    For very large date ranges, this might be slower but more reliable.
+    Searches run on a bounded thread pool (BULK_SEARCH_CONCURRENCY workers) so
+    the blocking Travelport calls overlap without an event loop, which keeps it
+    safe to call from the LangChain tool context.
+    
+    The search stops early, cancelling dates not yet started, once the best
+    price is at or below `price_floor`, or once `patience` consecutive
+    completed dates fail to beat it (None disables either check).
+    
+    Only the cheapest full result is retained unless `keep_all` is set, in
+    which case `all_results` lists every successful result in date order.
+    
+    With `return_duration` (one-way only), each date's return flight
+    `return_duration` days later is searched alongside the outbound and dates
+    are ranked by the combined price; the cheapest result then carries the
+    return leg under "return_result" (None if no date had a priced return).
     """
     if not dates:
         return {
@@ -826,15 +1085,18 @@ def bulk_search_cheapest_sync(origin: str, destination: str, dates: List[str],
             "all_results": []
         }
     
-    # Import payload functions and TravelportSearch
+    dates = _upcoming_unique_dates(dates)
+    if not dates:
+        return {
+            "ok": False,
+            "error": "All requested dates are in the past",
+            "cheapest_result": None,
+            "all_results": []
+        }
+    
+    # Fail fast if TravelportSearch can't be imported (lazy: it imports this module)
     try:
-        from .TravelportSearch import TravelportSearch
-        if trip_type == "one-way":
-            from ..payloads.OneWayFlightSearch import OneWayFlightSearch
-            payload_func = OneWayFlightSearch
-        else:
-            from ..payloads.RoundTripFlightSearch import RoundTripFlightSearch
-            payload_func = RoundTripFlightSearch
+        from .TravelportSearch import TravelportSearch  # noqa: F401
     except ImportError as e:
         return {
             "ok": False,
@@ -843,64 +1105,135 @@ def bulk_search_cheapest_sync(origin: str, destination: str, dates: List[str],
             "all_results": []
         }
     
-    # Process searches sequentially
-    valid_results = []
+    # Outbound and return legs for each date are searched side by side and
+    # ranked by their combined price
+    paired = bool(return_duration) and trip_type == "one-way"
+    
+    def search_leg(leg_origin: str, leg_destination: str, date: str) -> Dict[str, Any]:
+        # Perform the search (cached for a few minutes per date/variant)
+        result = cached_search(leg_origin, leg_destination, date, number_of_passengers, carriers, trip_type)
+        logger.debug("[BulkSearch] Completed search for %s->%s %s: %s", leg_origin, leg_destination, date, "OK" if result.get("ok") else "FAILED")
+        
+        # Add date information to result
+        result["search_date"] = date
+        return result
+    
+    def leg_price(result: Dict[str, Any], date: str) -> Optional[float]:
+        # Extract price based on trip type
+        summary = result["summary"]
+        if trip_type == "round-trip" and summary.get("price_total"):
+            price = summary["price_total"].get("total")
+        elif trip_type == "one-way" and summary.get("price"):
+            price = summary["price"].get("total")
+        else:
+            price = None
+        
+        # parse once; an unusable price just doesn't compete
+        price_f = _to_float(price) if price else None
+        if price_f is None and price:
+            logger.warning("[BulkSearch] Unusable price for %s: %r", date, price)
+        return price_f
+    
+    valid_by_idx: Dict[int, Dict[str, Any]] = {}
+    successful = 0
     cheapest_result = None
     cheapest_price = float('inf')
+    cheapest_idx = len(dates)
+    searched = 0
+    no_improve = 0
+    stopped_early = False
+    legs: Dict[int, Dict[bool, Tuple[Optional[float], Optional[Dict[str, Any]]]]] = {}
+    best_outbound: Tuple[float, int, Optional[Dict[str, Any]]] = (float('inf'), len(dates), None)
     
     # For bulk search, process all dates (remove artificial limit)
     limited_dates = dates
-    print(f"[BulkSearch] Processing all {len(limited_dates)} dates for bulk search")
+    max_workers = min(BULK_SEARCH_CONCURRENCY, len(limited_dates) * (2 if paired else 1))
+    logger.info("[BulkSearch] Processing all %d dates for bulk search (%d in parallel)", len(limited_dates), max_workers)
     
-    for i, date in enumerate(limited_dates):
-        try:
-            print(f"[BulkSearch] Searching date {i+1}/{len(limited_dates)}: {date}")
+    # Results are reduced here on the calling thread as they complete, so no lock is needed
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk-search") as pool:
+        futures = {}
+        for i, d in enumerate(limited_dates):
+            futures[pool.submit(search_leg, origin, destination, d)] = (i, d, False)
+            if paired:
+                return_date = calculate_return_date(d, return_duration)
+                futures[pool.submit(search_leg, destination, origin, return_date)] = (i, d, True)
+        
+        for future in as_completed(futures):
+            idx, date, is_return = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Log the error but continue with other dates
+                logger.warning("[BulkSearch] Search failed for %s: %s", date, e)
+                result = None
             
-            # Create payload for this specific date
-            payload = payload_func(
-                origin=origin,
-                destination=destination,
-                departure_date=date,
-                number_of_passengers=number_of_passengers,
-                carriers=carriers
-            )
+            price_f = None
+            if result and result.get("ok") and result.get("summary"):
+                if not is_return:
+                    successful += 1
+                    if keep_all:
+                        valid_by_idx[idx] = result
+                price_f = leg_price(result, date)
             
-            # Perform the search
-            result = TravelportSearch.invoke({"payload": payload, "trip_type": trip_type})
-            print(f"[BulkSearch] Completed search for {date}: {'OK' if result.get('ok') else 'FAILED'}")
+            if paired:
+                # a date only competes once both of its legs are back
+                done = legs.setdefault(idx, {})
+                done[is_return] = (price_f, result)
+                if len(done) < 2:
+                    continue
+                del legs[idx]
+                (out_f, out_result), (ret_f, ret_result) = done[False], done[True]
+                if out_f is not None and (out_f, idx) < best_outbound[:2]:
+                    best_outbound = (out_f, idx, out_result)
+                if out_f is None or ret_f is None:
+                    price_f = None
+                else:
+                    price_f = out_f + ret_f
+                    result = {**out_result, "return_result": ret_result}
             
-            # Add date information to result
-            result["search_date"] = date
+            searched += 1
+            improved = False
+            # ties go to the earlier date, whatever finishes first
+            if price_f is not None and (price_f, idx) < (cheapest_price, cheapest_idx):
+                improved = price_f < cheapest_price
+                cheapest_price = price_f
+                cheapest_idx = idx
+                cheapest_result = result
             
-            if result.get("ok") and result.get("summary"):
-                valid_results.append(result)
-                
-                # Extract price based on trip type
-                summary = result["summary"]
-                if trip_type == "round-trip" and summary.get("price_total"):
-                    price = summary["price_total"].get("total")
-                elif trip_type == "one-way" and summary.get("price"):
-                    price = summary["price"].get("total")
-                else:
-                    continue
-                    
-                if price and float(price) < cheapest_price:
-                    cheapest_price = float(price)
-                    cheapest_result = result
-                    
-        except Exception as e:
-            # Log the error but continue with other dates
-            print(f"[BulkSearch] Search failed for {date}: {str(e)}")
-            continue
+            # patience only counts once there is a price to beat
+            if improved:
+                no_improve = 0
+            elif cheapest_result is not None:
+                no_improve += 1
+            
+            if searched < len(limited_dates) and (
+                (price_floor is not None and cheapest_price <= price_floor)
+                or (patience is not None and no_improve >= patience)
+            ):
+                logger.info("[BulkSearch] Stopping early after %d/%d dates at %s", searched, len(limited_dates), cheapest_price)
+                stopped_early = True
+                for f in futures:
+                    f.cancel()
+                break
+    
+    if paired and cheapest_result is None and best_outbound[2] is not None:
+        # no date had a priced return: fall back to the cheapest outbound alone
+        cheapest_price, _, outbound = best_outbound
+        cheapest_result = {**outbound, "return_result": None}
+    
+    # completion order -> input date order
+    valid_results = [valid_by_idx[i] for i in sorted(valid_by_idx)]
     
     return {
-        "ok": len(valid_results) > 0,
+        "ok": successful > 0,
         "cheapest_result": cheapest_result,
         "cheapest_price": cheapest_price if cheapest_price != float('inf') else None,
-        "total_searches": len(limited_dates),
-        "successful_searches": len(valid_results),
+        "total_searches": searched,
+        "successful_searches": successful,
+        "stopped_early": stopped_early,
         "all_results": valid_results,
-        "search_summary": f"Searched {len(limited_dates)} dates, found {len(valid_results)} valid options"
+        "search_summary": f"Searched {searched} dates, found {successful} valid options"
     }
 
 
@@ -910,46 +1243,57 @@ def calculate_return_date(departure_date: str, days_offset: int) -> str:
     Used when user specifies return trip duration like "10 days later".
     """
     try:
-        dep_date = datetime.strptime(departure_date, '%Y-%m-%d')
-        return_date = dep_date + timedelta(days=days_offset)
-        return return_date.strftime('%Y-%m-%d')
+        # fromisoformat is the C fast path for canonical dates; strptime still
+        # accepts the unpadded forms like '2025-1-5' it always has
+        if len(departure_date) == 10:
+            dep_date = date.fromisoformat(departure_date)
+        else:
+            dep_date = datetime.strptime(departure_date, '%Y-%m-%d').date()
+        return (dep_date + timedelta(days=days_offset)).isoformat()
     except ValueError:
         return departure_date  # Fallback to original if parsing fails
 
 
+_BULK_INDICATORS = (
+    'cheapest in',
+    'cheapest ticket in',
+    'cheapest flight in', 
+    'find cheapest',
+    'best price in',
+    'lowest fare in',
+    'between',
+    'next week',
+    'this week',
+    'next month',
+    'this month',
+    'november',
+    'december',
+    'january',
+    'february',
+    'march',
+    'april',
+    'may',
+    'june',
+    'july',
+    'august',
+    'september',
+    'october'
+)
+# One alternation scans the input once in C instead of one substring test per indicator.
+# Matched against lowered text: without IGNORECASE the engine skips ahead using the
+# set of indicator first letters, so the common non-bulk message is rejected ~6x faster.
+_BULK_RE = re.compile("|".join(map(re.escape, _BULK_INDICATORS)))
+
 def is_bulk_search_query(user_input: str) -> bool:
     """
     Quick check to determine if user input indicates a bulk search request.
     """
-    bulk_indicators = [
-        'cheapest in',
-        'cheapest ticket in',
-        'cheapest flight in', 
-        'find cheapest',
-        'best price in',
-        'lowest fare in',
-        'between',
-        'next week',
-        'this week',
-        'next month',
-        'this month',
-        'november',
-        'december',
-        'january',
-        'february',
-        'march',
-        'april',
-        'may',
-        'june',
-        'july',
-        'august',
-        'september',
-        'october'
-    ]
-    
-    user_lower = user_input.lower()
-    return any(indicator in user_lower for indicator in bulk_indicators)
+    return _BULK_RE.search(user_input.lower()) is not None
+
 
+_DAYS_RE = re.compile(r'(\d+)\s*days?')
+_WEEKS_RE = re.compile(r'(\d+)\s*weeks?')
+_WEEK_RE = re.compile(r'\b(a|one)\s*week\b')
 
 def extract_return_duration(user_input: str) -> Optional[int]:
     """
@@ -957,20 +1301,20 @@ def extract_return_duration(user_input: str) -> Optional[int]:
     Examples: "10 days", "2 weeks", "1 week"
     Returns number of days or None if not found.
     """
-    import re
+    user_lower = user_input.lower()
     
     # Pattern for "X days"
-    days_match = re.search(r'(\d+)\s*days?', user_input.lower())
+    days_match = _DAYS_RE.search(user_lower)
     if days_match:
         return int(days_match.group(1))
     
     # Pattern for "X weeks"  
-    weeks_match = re.search(r'(\d+)\s*weeks?', user_input.lower())
+    weeks_match = _WEEKS_RE.search(user_lower)
     if weeks_match:
         return int(weeks_match.group(1)) * 7
         
     # Pattern for "a week" or "one week"
-    if re.search(r'\b(a|one)\s*week\b', user_input.lower()):
+    if _WEEK_RE.search(user_lower):
         return 7
         
     return None
@@ -978,78 +1322,112 @@ def extract_return_duration(user_input: str) -> Optional[int]:
    
 
 # ------------------------------
-# Background Task Queue for Async Bulk Search
+# Background Task Pool for Async Bulk Search
 # ------------------------------
 
+import atexit
 import threading
 import time
-from queue import Queue
 from typing import Callable
 
-# Global task queue for background processing
-_task_queue = Queue()
-_worker_running = False
-_worker_thread = None
-_active_searches = set()  # Track active searches to prevent duplicates
+# Bounded pool so different users' bulk searches run side by side instead of FIFO
+_bulk_executor = ThreadPoolExecutor(
+    max_workers=max(1, int(os.getenv("BULK_WORKERS", "4"))),
+    thread_name_prefix="bulk",
+)
+atexit.register(_bulk_executor.shutdown, wait=False)
+_active_searches = set()  # Route keys "thread:origin:destination" of running searches
+_active_searches_lock = threading.Lock()
+_inflight: Dict[Tuple, Future] = {}  # search params -> Future of the running bulk search
+_inflight_lock = threading.Lock()
 _pending_messages = {}  # Storage for pending messages
 
-def _background_worker():
-    """Background worker that processes bulk search tasks"""
-    global _worker_running
-    print("[BulkSearch] Background worker started")
-    
-    while _worker_running:
-        try:
-            # Get task from queue (blocks for up to 1 second)
-            task = _task_queue.get(timeout=1.0)
-            
-            if task is None:  # Shutdown signal
-                break
-                
-            # Execute the task
-            task_func, args, kwargs = task
-            try:
-                task_func(*args, **kwargs)
-            except Exception as e:
-                print(f"[BulkSearch] Task execution error: {e}")
-            finally:
-                _task_queue.task_done()
-                
-        except:
-            # Timeout or queue empty, continue
-            continue
-    
-    print("[BulkSearch] Background worker stopped")
+def _log_task_error(future: Future):
+    """Surface exceptions from background tasks, which the pool would otherwise swallow"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("[BulkSearch] Task execution error: %s", future.exception())
 
-def start_background_worker():
-    """Start the background worker thread"""
-    global _worker_running, _worker_thread
-    
-    if not _worker_running:
-        _worker_running = True
-        _worker_thread = threading.Thread(target=_background_worker, daemon=True)
-        _worker_thread.start()
-        print("[BulkSearch] Background worker thread started")
-
-def stop_background_worker():
-    """Stop the background worker thread"""
-    global _worker_running, _worker_thread
+def queue_bulk_search_task(task_func: Callable, *args, **kwargs) -> Future:
+    """Submit a bulk search task to the background pool"""
+    logger.debug("[BulkSearch] Queueing task with kwargs: %s", kwargs)
+    future = _bulk_executor.submit(task_func, *args, **kwargs)
+    future.add_done_callback(_log_task_error)
+    logger.info("[BulkSearch] Task queued for background processing")
+    return future
+
+
+def _coalesced_bulk_search(origin: str, destination: str, dates: List[str],
+                           number_of_passengers: int, carriers: List[str],
+                           trip_type: str, return_duration: Optional[int] = None,
+                           patience: Optional[int] = 10) -> Dict[str, Any]:
+    """
+    bulk_search_cheapest_sync, but concurrent callers asking for the same search
+    (from any conversation) wait on the first caller's Future instead of
+    repeating its Travelport calls.
+    """
+    key = (origin, destination, tuple(dates), number_of_passengers,
+           tuple(sorted(carriers or ())), trip_type, return_duration, patience)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
     
-    if _worker_running:
-        _worker_running = False
-        _task_queue.put(None)  # Shutdown signal
-        if _worker_thread:
-            _worker_thread.join(timeout=2.0)
-        print("[BulkSearch] Background worker stopped")
-
-def queue_bulk_search_task(task_func: Callable, *args, **kwargs):
-    """Add a bulk search task to the background queue"""
-    if not _worker_running:
-        start_background_worker()
+    if not owner:
+        logger.info("[BulkSearch] Joining in-flight search for %s->%s", origin, destination)
+        return future.result()
     
-    print(f"[BulkSearch] Queueing task with kwargs: {kwargs}")
-    _task_queue.put((task_func, args, kwargs))
-    print(f"[BulkSearch] Task queued for background processing")
+    try:
+        result = bulk_search_cheapest_sync(
+            origin=origin,
+            destination=destination,
+            dates=dates,
+            number_of_passengers=number_of_passengers,
+            carriers=carriers,
+            trip_type=trip_type,
+            patience=patience,
+            return_duration=return_duration
+        )
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+# Whole-line templates for the bulk result message. Each is translated as a complete
+# sentence (TranslationService caches it per language) and filled in afterwards, so
+# word order follows the target language and prices, dates and codes stay as-is
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+def _localized(template: str, language: str, **values) -> str:
+    """Translate a line template and fill it in; English, or any failure, uses the template"""
+    text = template
+    if language != "en":
+        try:
+            from ..services.translation_service import translation_service
+            translated = translation_service.translate_from_english(template, language)
+            # a translation that dropped or renamed a placeholder can't be filled in
+            if translated and sorted(_PLACEHOLDER_RE.findall(translated)) == sorted(_PLACEHOLDER_RE.findall(template)):
+                text = translated
+        except Exception as e:
+            logger.warning("[BulkSearch] Template translation failed: %s", e)
+    try:
+        return text.format(**values)
+    except (KeyError, IndexError, ValueError):
+        return template.format(**values)
+
+
+def _stops_template(stops: int) -> str:
+    if stops == 0:
+        return "Duration: {duration}, non-stop"
+    if stops == 1:
+        return "Duration: {duration}, 1 stop"
+    return "Duration: {duration}, {stops} stops"
 
 
 def execute_bulk_search_background(origin: str, destination: str, dates: List[str], 
@@ -1060,29 +1438,38 @@ def execute_bulk_search_background(origin: str, destination: str, dates: List[st
     Execute bulk search in background and send result via callback.
     This function runs in a separate thread.
     """
-    search_key = f"{thread_id}:{origin}:{destination}:{len(dates)}"
+    search_key = f"{thread_id}:{origin}:{destination}"
     
     # Check if this search is already running
-    global _active_searches
-    if search_key in _active_searches:
-        print(f"[BulkSearch] Search already running for {search_key}, skipping duplicate")
-        return
-    
-    _active_searches.add(search_key)
-    print(f"[BulkSearch] Starting background bulk search for {len(dates)} dates")
-    print(f"[BulkSearch] Background search thread_id: {thread_id}")
+    with _active_searches_lock:
+        if search_key in _active_searches:
+            logger.info("[BulkSearch] Search already running for %s, skipping duplicate", search_key)
+            return
+        _active_searches.add(search_key)
+    logger.info("[BulkSearch] Starting background bulk search for %d dates", len(dates))
+    logger.debug("[BulkSearch] Background search thread_id: %s", thread_id)
     
     try:
-        # Perform the bulk search
-        bulk_result = bulk_search_cheapest_sync(
+        # A requested stay ("back after 10 days") is searched together with the outbound
+        return_duration = extract_return_duration(original_user_input) if trip_type == "one-way" else None
+        
+        # Perform the bulk search, sharing it with identical searches already running
+        bulk_result = _coalesced_bulk_search(
             origin=origin,
             destination=destination,
             dates=dates,
             number_of_passengers=number_of_passengers,
             carriers=carriers,
-            trip_type=trip_type
+            trip_type=trip_type,
+            return_duration=return_duration,
+            # the user asked for the cheapest across the whole month/range, so
+            # every date is searched rather than stopping after a dry streak
+            patience=None
         )
         
+        def T(template: str, **values) -> str:
+            return _localized(template, detected_language, **values)
+        
         # Format the response message
         if bulk_result.get("ok") and bulk_result.get("cheapest_result"):
             cheapest = bulk_result["cheapest_result"]
@@ -1090,110 +1477,95 @@ def execute_bulk_search_background(origin: str, destination: str, dates: List[st
             search_date = cheapest.get("search_date")
             
             price = summary.get("price", {})
-            price_text = f"{price.get('total')} {price.get('currency')}" if price.get('total') else "Price not available"
             
             # Import here to avoid circular imports
-            from ..tools.FlightSearchStateMachine import format_duration, format_stops, format_layovers, format_baggage_summary
+            from ..tools.FlightSearchStateMachine import format_duration, format_baggage_summary
             
             duration = format_duration(summary.get("duration_minutes_total"))
-            stops = format_stops(summary.get("stops_total", 0))
+            stops_total = summary.get("stops_total", 0)
             
-            message = f"🎯 Cheapest option found!\n\n"
-            message += f"✈️ {origin} → {destination} on {search_date}\n"
-            message += f"💰 Price: {price_text}\n"
-            message += f"⏱️ Duration: {duration}, {stops}\n"
+            message = f"🎯 {T('Cheapest option found!')}\n\n"
+            message += f"✈️ {T('{origin} → {destination} on {date}', origin=origin, destination=destination, date=search_date)}\n"
+            if price.get('total'):
+                price_text = f"{price.get('total')} {price.get('currency')}"
+                message += f"💰 {T('Price: {price}', price=price_text)}\n"
+            else:
+                message += f"💰 {T('Price: not available')}\n"
+            message += f"⏱️ {T(_stops_template(stops_total), duration=duration, stops=stops_total)}\n"
             
             it = summary.get("itinerary", {})
             if it.get("airlines"):
-                message += f"🏢 Airline: {it['airlines']}\n"
+                message += f"🏢 {T('Airline: {airlines}', airlines=it['airlines'])}\n"
             if it.get("flight_numbers"):
-                message += f"🔢 Flight: {it['flight_numbers']}\n"
+                message += f"🔢 {T('Flight: {flights}', flights=it['flight_numbers'])}\n"
             
             # Add layover information
             layovers = it.get("layovers", [])
             if layovers:
                 layover_info = ", ".join([f"{l.get('airport_code', l.get('city', 'Unknown'))} ({l.get('duration', 'Unknown')})" for l in layovers])
-                message += f"🔄 Layovers: {layover_info}\n"
+                message += f"🔄 {T('Layovers: {layovers}', layovers=layover_info)}\n"
             
             if summary.get("baggage"):
-                message += f"🧳 Baggage: {format_baggage_summary(summary['baggage'])}\n"
+                # Free text built per fare, so it is translated as content rather than as a template
+                baggage = format_baggage_summary(summary['baggage'])
+                if detected_language != "en":
+                    from ..services.translation_service import translation_service
+                    baggage = translation_service.translate_from_english(baggage, detected_language) or baggage
+                message += f"🧳 {T('Baggage: {baggage}', baggage=baggage)}\n"
             
-            message += f"\n📊 Searched {bulk_result.get('total_searches')} dates, found {bulk_result.get('successful_searches')} options"
+            if bulk_result.get("stopped_early"):
+                message += f"\n📊 {T('Stopped early after {searched} of {requested} dates, found {found} options', searched=bulk_result.get('total_searches'), requested=len(dates), found=bulk_result.get('successful_searches'))}"
+            else:
+                message += f"\n📊 {T('Searched {searched} dates, found {found} options', searched=bulk_result.get('total_searches'), found=bulk_result.get('successful_searches'))}"
             
-            # Check if this is a return trip request and search for return flights
-            return_duration = extract_return_duration(original_user_input)
+            # Return leg was searched alongside the outbound dates (cheapest combined pair)
             if return_duration and cheapest:
                 try:
-                    from datetime import datetime, timedelta
-                    
-                    # Calculate return date
-                    departure_date = datetime.strptime(search_date, '%Y-%m-%d')
-                    return_date = departure_date + timedelta(days=return_duration)
-                    return_date_str = return_date.strftime('%Y-%m-%d')
+                    return_date_str = calculate_return_date(search_date, return_duration)
+                    return_result = cheapest.get("return_result") or {}
                     
-                    # Search for return flight
-                    if trip_type == "one-way":
-                        from ..payloads.OneWayFlightSearch import OneWayFlightSearch
-                        return_payload = OneWayFlightSearch(
-                            origin=destination,  # Reversed
-                            destination=origin,   # Reversed
-                            departure_date=return_date_str,
-                            number_of_passengers=number_of_passengers,
-                            carriers=carriers
-                        )
+                    if return_result.get("ok") and return_result.get("summary"):
+                        return_summary = return_result["summary"]
+                        return_price = return_summary.get("price", {})
+                        return_duration_text = format_duration(return_summary.get("duration_minutes_total"))
+                        return_stops_total = return_summary.get("stops_total", 0)
                         
-                        from .TravelportSearch import TravelportSearch
-                        return_result = TravelportSearch.invoke({"payload": return_payload, "trip_type": "one-way"})
-                        
-                        if return_result.get("ok") and return_result.get("summary"):
-                            return_summary = return_result["summary"]
-                            return_price = return_summary.get("price", {})
-                            return_price_text = f"{return_price.get('total')} {return_price.get('currency')}" if return_price.get('total') else "Price not available"
-                            return_duration_text = format_duration(return_summary.get("duration_minutes_total"))
-                            return_stops = format_stops(return_summary.get("stops_total", 0))
-                            
-                            message += f"\n\n🔄 Return flight ({return_duration} days later):\n"
-                            message += f"✈️ {destination} → {origin} on {return_date_str}\n"
-                            message += f"💰 Price: {return_price_text}\n"
-                            message += f"⏱️ Duration: {return_duration_text}, {return_stops}\n"
-                            
-                            # Add return layover info
-                            return_it = return_summary.get("itinerary", {})
-                            return_layovers = return_it.get("layovers", [])
-                            if return_layovers:
-                                return_layover_info = ", ".join([f"{l.get('airport_code', l.get('city', 'Unknown'))} ({l.get('duration', 'Unknown')})" for l in return_layovers])
-                                message += f"🔄 Return layovers: {return_layover_info}\n"
-                            
-                            # Calculate total price
-                            outbound_price = float(price.get('total', 0))
-                            return_price_val = float(return_price.get('total', 0))
-                            total_price = outbound_price + return_price_val
-                            message += f"\n💰 Total round-trip price: {total_price:.2f} {price.get('currency', 'EUR')}"
+                        message += f"\n\n🔄 {T('Return flight ({days} days later):', days=return_duration)}\n"
+                        message += f"✈️ {T('{origin} → {destination} on {date}', origin=destination, destination=origin, date=return_date_str)}\n"
+                        if return_price.get('total'):
+                            return_price_text = f"{return_price.get('total')} {return_price.get('currency')}"
+                            message += f"💰 {T('Price: {price}', price=return_price_text)}\n"
                         else:
-                            message += f"\n\n❌ No return flights found for {return_date_str}"
-                            
+                            message += f"💰 {T('Price: not available')}\n"
+                        message += f"⏱️ {T(_stops_template(return_stops_total), duration=return_duration_text, stops=return_stops_total)}\n"
+                        
+                        # Add return layover info
+                        return_it = return_summary.get("itinerary", {})
+                        return_layovers = return_it.get("layovers", [])
+                        if return_layovers:
+                            return_layover_info = ", ".join([f"{l.get('airport_code', l.get('city', 'Unknown'))} ({l.get('duration', 'Unknown')})" for l in return_layovers])
+                            message += f"🔄 {T('Return layovers: {layovers}', layovers=return_layover_info)}\n"
+                        
+                        # Calculate total price
+                        outbound_price = float(price.get('total', 0))
+                        return_price_val = float(return_price.get('total', 0))
+                        total_price = outbound_price + return_price_val
+                        total_text = f"{total_price:.2f} {price.get('currency', 'EUR')}"
+                        message += f"\n💰 {T('Total round-trip price: {total}', total=total_text)}"
+                    else:
+                        message += f"\n\n❌ {T('No return flights found for {date}', date=return_date_str)}"
+                        
                 except Exception as e:
-                    print(f"[BulkSearch] Error searching return flights: {e}")
-                    message += f"\n\n❌ Error searching return flights"
+                    logger.warning("[BulkSearch] Error searching return flights: %s", e)
+                    message += f"\n\n❌ {T('Error searching return flights')}"
             
         else:
-            message = f"❌ Bulk search completed but no flights found across {bulk_result.get('total_searches', 0)} dates."
-        
-        # Translate message if user language is not English
-        if detected_language != "en":
-            try:
-                from ..services.translation_service import translation_service
-                translated_message = translation_service.translate_from_english(message, detected_language)
-                if translated_message:
-                    message = translated_message
-                    print(f"[BulkSearch] Translated response to {detected_language}")
-            except Exception as e:
-                print(f"[BulkSearch] Translation failed: {e}")
+            message = f"❌ {T('Bulk search completed but no flights found across {searched} dates.', searched=bulk_result.get('total_searches', 0))}"
         
         # Send the result back to the user
-        print(f"[BulkSearch] About to send response to thread_id: {thread_id}")
+        logger.debug("[BulkSearch] About to send response to thread_id: %s", thread_id)
         send_async_response(thread_id, message, user_phone)
-        print(f"[BulkSearch] Completed bulk search for {thread_id}")
+        logger.info("[BulkSearch] Completed bulk search for %s", thread_id)
         
     except Exception as e:
         error_message = f"❌ Bulk search failed: {str(e)}"
@@ -1206,20 +1578,22 @@ def execute_bulk_search_background(origin: str, destination: str, dates: List[st
                 if translated_error:
                     error_message = translated_error
             except Exception as trans_e:
-                print(f"[BulkSearch] Error translation failed: {trans_e}")
+                logger.warning("[BulkSearch] Error translation failed: %s", trans_e)
         
         send_async_response(thread_id, error_message, user_phone)
-        print(f"[BulkSearch] Background execution error: {e}")
+        logger.error("[BulkSearch] Background execution error: %s", e)
     finally:
         # Remove from active searches when done
-        _active_searches.discard(search_key)
+        with _active_searches_lock:
+            _active_searches.discard(search_key)
 
 
 def send_async_response(thread_id: str, message: str, user_phone: str = None):
     """
     Send bulk search results back to user via Twilio WhatsApp.
+    Messages for the same number within a short window are batched into one send.
     """
-    print(f"[BulkSearch] Sending results to {thread_id}: {message[:100]}...")
+    logger.debug("[BulkSearch] Sending results to %s: %.100s...", thread_id, message)
     
     try:
         # Extract WhatsApp phone number from thread_id
@@ -1230,75 +1604,153 @@ def send_async_response(thread_id: str, message: str, user_phone: str = None):
         # 2. WhatsApp ID format: e.g. "whatsapp:+447948623631"  
         # 3. Phone number with + prefix: e.g. "+447948623631"
         
-        if thread_id.startswith("whatsapp:"):
+        # dispatch on the first character; only the matching branch scans further
+        c = thread_id[:1]
+        if c == "w" and thread_id.startswith("whatsapp:"):
             # Already in WhatsApp format
             whatsapp_number = thread_id
-            print(f"[BulkSearch] Thread ID is already WhatsApp format: {whatsapp_number}")
-        elif thread_id.startswith("+"):
+            logger.debug("[BulkSearch] Thread ID is already WhatsApp format: %s", whatsapp_number)
+        elif c == "+":
             # Phone number with + prefix
             whatsapp_number = f"whatsapp:{thread_id}"
-            print(f"[BulkSearch] Converted phone number to WhatsApp format: {whatsapp_number}")
-        elif thread_id.isdigit():
+            logger.debug("[BulkSearch] Converted phone number to WhatsApp format: %s", whatsapp_number)
+        elif c.isdigit() and thread_id.isdigit():
             # Pure digits - assume it's a phone number and add + prefix
             whatsapp_number = f"whatsapp:+{thread_id}"
-            print(f"[BulkSearch] Converted digit string to WhatsApp format: {whatsapp_number}")
+            logger.debug("[BulkSearch] Converted digit string to WhatsApp format: %s", whatsapp_number)
         else:
-            print(f"[BulkSearch] Thread ID '{thread_id}' is not a valid phone number format, cannot send WhatsApp")
+            logger.warning("[BulkSearch] Thread ID '%s' is not a valid phone number format, cannot send WhatsApp", thread_id)
             return
         
         if whatsapp_number:
-            send_whatsapp_message(whatsapp_number, message)
+            _queue_whatsapp_send(whatsapp_number, message)
         else:
-            print(f"[BulkSearch] Could not extract valid phone number from thread_id: {thread_id}")
+            logger.warning("[BulkSearch] Could not extract valid phone number from thread_id: %s", thread_id)
             
     except Exception as e:
-        print(f"[BulkSearch] Failed to send WhatsApp message: {e}")
+        logger.error("[BulkSearch] Failed to send WhatsApp message: %s", e)
+
+
+# Replies to the same number within this window go out as one WhatsApp message
+_SEND_BATCH_WINDOW = 0.5
+_WHATSAPP_MAX_CHARS = 1400
+_SEND_SEPARATOR = "\n\n---\n\n"
+_pending_sends: Dict[str, List[str]] = {}
+_pending_sends_lock = threading.Lock()
+_send_timer = None
+
+
+def _queue_whatsapp_send(phone_number: str, message: str):
+    """Buffer a message and make sure a flush is scheduled for the current window"""
+    global _send_timer
+    with _pending_sends_lock:
+        _pending_sends.setdefault(phone_number, []).append(message)
+        if _send_timer is None:
+            _send_timer = threading.Timer(_SEND_BATCH_WINDOW, _flush_sends)
+            _send_timer.daemon = True
+            _send_timer.start()
+
+
+def _split_for_whatsapp(messages: List[str], limit: int = _WHATSAPP_MAX_CHARS) -> List[str]:
+    """Join messages into as few bodies as fit the limit, splitting oversized ones at newlines"""
+    parts: List[str] = []
+    for msg in messages:
+        while len(msg) > limit:
+            cut = msg.rfind("\n", 0, limit)
+            if cut <= 0:
+                cut = limit
+            parts.append(msg[:cut])
+            msg = msg[cut:].lstrip("\n")
+        parts.append(msg)
+    
+    bodies: List[str] = []
+    for part in parts:
+        if bodies and len(bodies[-1]) + len(_SEND_SEPARATOR) + len(part) <= limit:
+            bodies[-1] += _SEND_SEPARATOR + part
+        else:
+            bodies.append(part)
+    return bodies
+
+
+def _flush_sends():
+    """Send everything buffered in the last window, one Twilio call per body"""
+    global _send_timer
+    with _pending_sends_lock:
+        batches = dict(_pending_sends)
+        _pending_sends.clear()
+        _send_timer = None
+    
+    for phone_number, messages in batches.items():
+        if len(messages) > 1:
+            logger.debug("[BulkSearch] Batching %d messages for %s", len(messages), phone_number)
+        for body in _split_for_whatsapp(messages):
+            send_whatsapp_message(phone_number, body)
+
+
+# Twilio settings are read once at import; .env is not re-parsed per message
+from dotenv import load_dotenv
+
+load_dotenv()
+_TWILIO_SID = os.getenv('TWILIO_ACCOUNT_SID')
+_TWILIO_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
+_TWILIO_WA_FROM = os.getenv('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886')
+
+# Shared Twilio REST client (keep-alive, HTTP/2) so messages reuse the warm TLS connection
+_twilio_client = None
+_twilio_lock = threading.Lock()
+
+
+def _get_twilio_client():
+    """Build the shared Twilio httpx client on first use; None if credentials are missing"""
+    global _twilio_client
+    if _twilio_client is not None or not (_TWILIO_SID and _TWILIO_TOKEN):
+        return _twilio_client
+    
+    with _twilio_lock:
+        if _twilio_client is None:
+            import httpx
+            
+            _twilio_client = httpx.Client(
+                base_url=f"https://api.twilio.com/2010-04-01/Accounts/{_TWILIO_SID}",
+                auth=(_TWILIO_SID, _TWILIO_TOKEN),
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20),
+                timeout=httpx.Timeout(30.0),
+            )
+        return _twilio_client
 
 
 def send_whatsapp_message(phone_number: str, message: str):
     """
     Send a WhatsApp message via Twilio REST API.
     """
-    print(f"[BulkSearch] Sending WhatsApp to {phone_number}")
+    logger.debug("[BulkSearch] Sending WhatsApp to %s", phone_number)
     
     try:
-        import os
-        from twilio.rest import Client
-        from dotenv import load_dotenv
-        
-        load_dotenv()
-        
-        # Get Twilio credentials from environment
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        twilio_whatsapp_number = os.getenv('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886')
-        
-        if not account_sid or not auth_token:
-            print("[BulkSearch] ERROR: Twilio credentials not found in environment variables")
-            print("[BulkSearch] Please set TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN in your .env file")
+        client = _get_twilio_client()
+        if client is None:
+            logger.error("[BulkSearch] Twilio credentials not found; set TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN in your .env file")
             return
         
-        # Create Twilio client
-        client = Client(account_sid, auth_token)
-        
         # Send the WhatsApp message
-        message_obj = client.messages.create(
-            from_=twilio_whatsapp_number,
-            body=message,
-            to=phone_number
-        )
+        resp = client.post("/Messages.json", data={
+            "From": _TWILIO_WA_FROM,
+            "To": phone_number,
+            "Body": message,
+        })
+        resp.raise_for_status()
         
-        print(f"[BulkSearch] ✅ WhatsApp message sent successfully! Message SID: {message_obj.sid}")
+        logger.info("[BulkSearch] WhatsApp message sent, SID: %s", resp.json().get("sid"))
         
     except Exception as e:
-        print(f"[BulkSearch] ❌ Failed to send WhatsApp message: {e}")
+        logger.error("[BulkSearch] Failed to send WhatsApp message: %s", e)
 
 
 def store_pending_message(thread_id: str, message: str):
     """
     Store a pending message for the user to receive on their next interaction.
     """
-    print(f"[BulkSearch] Storing pending message for {thread_id}")
+    logger.debug("[BulkSearch] Storing pending message for %s", thread_id)
     
     # Use a simple in-memory storage for pending messages
     # In production, you might want to use Redis or a database
@@ -1315,13 +1767,7 @@ def store_pending_message(thread_id: str, message: str):
             'timestamp': time.time()
         })
         
-        print(f"[BulkSearch] Stored pending message for {thread_id}")
+        logger.info("[BulkSearch] Stored pending message for %s", thread_id)
         
     except Exception as e:
-        print(f"[BulkSearch] Failed to store pending message: {e}")
-
-
-# Initialize worker on module import
-start_background_worker()
-
-   
+        logger.error("[BulkSearch] Failed to store pending message: %s", e)
@@ -1,22 +1,61 @@
 import os 
 from dotenv import load_dotenv
 import html
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import FastAPI, Form
+from fastapi import FastAPI, Request
 from fastapi.responses import Response
 
+# Application log level; module loggers use DEBUG for per-request detail
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
 # Import our LangGraph configuration
-from app.langgraph import create_graph, invoke_graph, extract_last_ai_text
+from app.langgraph import get_graph, invoke_graph, extract_last_ai_text
+
+# Language detection / translation around the graph
+from app.services.translation_service import translation_service
+
+# Micro-batcher in front of the LangGraph pipeline
+from app.batching import LLMBatcher
 
 # Import voice processing components
 from app.speech.speech_processor import queue_voice_task, process_voice_message_background
 
-# Create the graph
-graph = create_graph()
-
 # Create FastAPI app
 app = FastAPI()
 
+@app.on_event("startup")
+def warm_graph():
+    # Build the graph once the worker is up, keeping import cheap without a slow first request
+    get_graph()
+
+# Dedicated pool for the blocking translation + LangGraph pipeline, so slow LLM calls
+# neither pin the event loop nor compete with Starlette's shared threadpool
+_llm_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_WORKERS", "32")), thread_name_prefix="llm")
+
+# Static TwiML wrapper, encoded once; only the escaped reply is encoded per request
+TWIML_TEMPLATE = b'<?xml version="1.0" encoding="UTF-8"?><Response><Message>%s</Message></Response>'
+
+VOICE_ACK_TEXT = "🎤 Got your voice message! We're working on it and will respond shortly..."
+UNSUPPORTED_MEDIA_TEXT = "Sorry, I can only process text messages and voice notes. Please send your message as text or a voice note."
+
+# Characters html.escape rewrites; most replies contain none, so one scan replaces five
+_NEEDS_ESCAPE = re.compile(r'[&<>"\']').search
+
+def _render_twiml(reply_text: str) -> bytes:
+    body = html.escape(reply_text) if _NEEDS_ESCAPE(reply_text) else reply_text
+    return TWIML_TEMPLATE % body.encode("utf-8")
+
+# Constant replies are rendered once at import and served as-is
+_STATIC_TWIML = {text: _render_twiml(text) for text in (VOICE_ACK_TEXT, UNSUPPORTED_MEDIA_TEXT)}
+
+def twiml_message(reply_text: str) -> bytes:
+    """Wrap a reply in a TwiML <Message> response body"""
+    return _STATIC_TWIML.get(reply_text) or _render_twiml(reply_text)
+
 @app.get("/")
 async def healthcheck():
     return {"status": "ok"}
@@ -24,25 +63,54 @@ async def healthcheck():
 def queue_voice_processing(media_url: str, thread_id: str, from_number: str) -> str:
     """Queue voice message for background processing and return immediate response"""
     try:
-        print(f"🎤 Queueing voice message for background processing: {media_url}")
+        logger.info("[Webhook] Queueing voice message for background processing: %s", media_url)
         
         # Queue the heavy processing for background
-        queue_voice_task(process_voice_message_background, media_url, thread_id, from_number)
+        queue_voice_task(thread_id, process_voice_message_background, media_url, thread_id, from_number)
         
-        return "🎤 Got your voice message! We're working on it and will respond shortly..."
+        return VOICE_ACK_TEXT
         
     except Exception as e:
-        print(f"❌ Error queueing voice processing: {e}")
+        logger.error("[Webhook] Error queueing voice processing: %s", e)
         return "Sorry, there was an error processing your voice message."
 
+def process_text_message(body: str, thread_id: str) -> str:
+    """Translate, run the graph and translate back; blocking, so run it off the event loop"""
+    detected_language, english_text = translation_service.detect_and_translate_to_english(body)
+    
+    if english_text is None:
+        # Translation failed, use original text
+        english_text = body
+        detected_language = "en"
+    
+    # Process through LangGraph with English text
+    state = invoke_graph(get_graph(), english_text, thread_id, detected_language=detected_language)
+    reply_text = extract_last_ai_text(state) or "Got it."
+    
+    # Translate response back to detected language if needed
+    if detected_language != "en":
+        translated_reply = translation_service.translate_from_english(reply_text, detected_language)
+        if translated_reply:
+            reply_text = translated_reply
+    
+    return reply_text
+
+# Groups messages arriving within a short window and fans them out on the LLM pool
+llm_batcher = LLMBatcher(
+    process_text_message,
+    _llm_executor,
+    window_ms=float(os.getenv("WEBHOOK_BATCH_WINDOW_MS", "30")),
+)
+
 @app.post("/webhook")
-async def twilio_whatsapp(
-    Body: str = Form(default=""), 
-    From: str | None = Form(default=None), 
-    WaId: str | None = Form(default=None),
-    MediaUrl0: str | None = Form(default=None),
-    MediaContentType0: str | None = Form(default=None)
-):
+async def twilio_whatsapp(request: Request):
+    # Read Twilio's form directly rather than via per-field Form() dependencies
+    form = await request.form()
+    Body = form.get("Body", "")
+    From = form.get("From")
+    WaId = form.get("WaId")
+    MediaUrl0 = form.get("MediaUrl0")
+    MediaContentType0 = form.get("MediaContentType0")
     thread_id = WaId or From or "whatsapp-default"
     
     try:
@@ -52,12 +120,7 @@ async def twilio_whatsapp(
             
             if not is_voice_message:
                 # Reject unsupported media types
-                reply_text = "Sorry, I can only process text messages and voice notes. Please send your message as text or a voice note."
-                twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-                <Response>
-                    <Message>{html.escape(reply_text)}</Message>
-                </Response>"""
-                return Response(content=twiml, media_type="application/xml")
+                return Response(content=_STATIC_TWIML[UNSUPPORTED_MEDIA_TEXT], media_type="application/xml")
         
         # Check if this is a voice message
         is_voice_message = (MediaUrl0 and 
@@ -69,45 +132,32 @@ async def twilio_whatsapp(
             reply_text = queue_voice_processing(MediaUrl0, thread_id, From)
             
             # Return immediate acknowledgment
-            twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-            <Response>
-                <Message>{html.escape(reply_text)}</Message>
-            </Response>"""
+            twiml = twiml_message(reply_text)
         else:
-            # Process text message with language detection
-            from app.services.translation_service import translation_service
-            detected_language, english_text = translation_service.detect_and_translate_to_english(Body)
-            
-            if english_text is None:
-                # Translation failed, use original text
-                english_text = Body
-                detected_language = "en"
-            
-            # Process through LangGraph with English text
-            state = invoke_graph(graph, english_text, thread_id, detected_language=detected_language)
-            reply_text = extract_last_ai_text(state) or "Got it."
-            
-            # Translate response back to detected language if needed
-            if detected_language != "en":
-                translated_reply = translation_service.translate_from_english(reply_text, detected_language)
-                if translated_reply:
-                    reply_text = translated_reply
+            # Process text message with language detection on the LLM pool so
+            # concurrent webhooks aren't serialized behind one graph invocation
+            reply_text = await llm_batcher.submit(Body, thread_id)
             
-            twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-            <Response>
-                <Message>{html.escape(reply_text)}</Message>
-            </Response>"""
+            twiml = twiml_message(reply_text)
             
     except Exception as e:
         reply_text = f"Error: {e}"
-        twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-        <Response>
-            <Message>{html.escape(reply_text)}</Message>
-        </Response>"""
+        twiml = twiml_message(reply_text)
     
     return Response(content=twiml, media_type="application/xml")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=int(os.getenv("PORT", "8000")), reload=False)
+    # "auto" picks uvloop and httptools (installed with uvicorn[standard]) and falls back
+    # to asyncio/h11 without them. Chat memory and graph checkpoints live in-process,
+    # so stay on one worker unless each conversation is pinned to a worker.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        reload=False,
+        loop="auto",
+        http="auto",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
 
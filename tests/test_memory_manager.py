@@ -7,6 +7,7 @@ import pytest
 import time
 import os
 import uuid
+from collections import deque
 from unittest.mock import Mock, patch, MagicMock
 from moto import mock_dynamodb
 import boto3
@@ -389,8 +390,9 @@ class TestDynamoDBOperations:
         state = memory_manager._get_thread_state(thread_id)
         
         # Move some pairs to batch
-        state.batch_pairs = state.context_pairs[:2]
-        state.context_pairs = state.context_pairs[2:]
+        pairs = list(state.context_pairs)
+        state.batch_pairs = pairs[:2]
+        state.context_pairs = deque(pairs[2:], maxlen=CONTEXT_PAIRS)
         
         # Test flush batch
         with patch.object(memory_manager, '_batch_write_pairs') as mock_batch_write:
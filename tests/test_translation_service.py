@@ -0,0 +1,57 @@
+"""
+Test suite for the translation service's local English detection.
+"""
+
+import os
+
+import pytest
+
+# The module builds its OpenAI client at import time
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from app.services.translation_service import _looks_english
+
+
+class TestLooksEnglish:
+    """Test the local English fast path in front of remote detection"""
+
+    @pytest.mark.parametrize("text", [
+        "I want a flight to Dubai",
+        "find me the cheapest flight in july",
+        "Thanks, book it please",
+        "What is the price?",
+    ])
+    def test_english_detected(self, text):
+        """Plain English requests skip the remote detector"""
+        assert _looks_english(text)
+
+    @pytest.mark.parametrize("text", [
+        "No, gracias",
+        "me llamo Juan",
+        "a la playa",
+        "Quiero un vuelo a Madrid",
+        "Was ist das?",
+        "in Ordnung",
+        "Je suis a Paris",
+        "no se",
+    ])
+    def test_short_latin_script_not_english(self, text):
+        """Short ASCII text in other languages is left to the remote detector"""
+        assert not _looks_english(text)
+
+    @pytest.mark.parametrize("text", [
+        "mujhe flight chahiye",
+        "kya price hai",
+    ])
+    def test_roman_urdu_not_english(self, text):
+        """Roman Urdu mixed with English words is never treated as English"""
+        assert not _looks_english(text)
+
+    def test_single_common_word_not_enough(self):
+        """One English hit is too little evidence on its own"""
+        assert not _looks_english("ok")
+        assert not _looks_english("hello")
+
+    def test_non_ascii_not_english(self):
+        """Non-ASCII text always goes to the remote detector"""
+        assert not _looks_english("مجھے فلائٹ چاہیے")